@@ -5,9 +5,24 @@ Handles loading, saving, and validation of user settings.
 
 import json
 import os
+import pickle
+import sys
 from pathlib import Path
 from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, field, fields, is_dataclass
+
+from . import __version__
+from .profiling import measure
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
 
 
 @dataclass
@@ -20,6 +35,17 @@ class LLMConfig:
     temperature: float = 0.1
     max_tokens: int = 2048
     backup_providers: List[str] = field(default_factory=lambda: ["deepseek", "gemini"])
+    # Per-model request limits, e.g. {"llama-3.3-70b-versatile": {"tpm": 12000, "rpm": 30}};
+    # merged over the built-in Groq defaults
+    rate_limits: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    # Reuse cached actions for paraphrased commands (needs sentence-transformers)
+    semantic_cache_enabled: bool = False
+    
+    def __post_init__(self):
+        # Provider names are stored lowercase (and interned) so lookups
+        # can skip per-call normalization
+        if any(p != p.lower() for p in self.api_keys):
+            self.api_keys = {sys.intern(p.lower()): k for p, k in self.api_keys.items()}
 
 
 @dataclass
@@ -117,6 +143,80 @@ class TessConfig:
     version: str = "1.1.0"
 
 
+def _config_from_dict(data: Dict[str, Any], first_run: bool) -> TessConfig:
+    """Build a TessConfig from parsed JSON, filling in missing sections."""
+    return TessConfig(
+        llm=LLMConfig(**data.get('llm', {})),
+        security=SecurityConfig(**data.get('security', {})),
+        features=FeatureConfig(**data.get('features', {})),
+        paths=PathConfig(**data.get('paths', {})),
+        whatsapp=WhatsAppConfig(**data.get('whatsapp', {})),
+        google=GoogleConfig(**data.get('google', {})),
+        telegram_token=data.get('telegram_token', ''),
+        telegram_user_id=data.get('telegram_user_id', ''),
+        telegram_allowed_users=data.get('telegram_allowed_users', []),
+        first_run=first_run,
+        version=data.get('version', '1.0.0')
+    )
+
+
+_config_decoder = None
+
+
+def _decode_config(raw: bytes) -> Optional[TessConfig]:
+    """
+    Decode config.json straight into TessConfig with msgspec, if installed.
+    Returns None when msgspec is missing or the file needs the legacy path
+    (old single-string api_keys, or missing first_run/version, whose load
+    defaults differ from the dataclass defaults).
+    """
+    global _config_decoder
+    if msgspec is None or b'"first_run"' not in raw or b'"version"' not in raw:
+        return None
+    if _config_decoder is None:
+        _config_decoder = msgspec.json.Decoder(TessConfig)
+    try:
+        return _config_decoder.decode(raw)
+    except (msgspec.ValidationError, msgspec.DecodeError):
+        return None
+
+
+# Field names per dataclass type, resolved once
+_FIELD_NAMES: Dict[type, tuple] = {}
+
+
+def _shallow_dict(obj) -> Dict[str, Any]:
+    """
+    Dataclass -> dict without asdict()'s recursive deep copy.
+    Values are shared with the dataclass, which is fine for serializing.
+    """
+    names = _FIELD_NAMES.get(type(obj))
+    if names is None:
+        names = _FIELD_NAMES[type(obj)] = tuple(f.name for f in fields(obj))
+    return {name: getattr(obj, name) for name in names}
+
+
+class _DataUnpickler(pickle.Unpickler):
+    """Unpickler for plain dicts, lists and scalars; refuses to import any class."""
+    
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"refusing to load {module}.{name}")
+
+
+def _file_stamp(path: Path) -> tuple:
+    """(mtime_ns, size) of path, to tell whether it changed."""
+    st = path.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _cache_tag() -> tuple:
+    """Package version plus the config field layout; a pickle from any other layout is stale."""
+    return (__version__,) + tuple(
+        (f.name, tuple(sub.name for sub in fields(f.type)) if is_dataclass(f.type) else ())
+        for f in fields(TessConfig)
+    )
+
+
 class ConfigManager:
     """
     Manages TESS configuration with persistent storage.
@@ -125,7 +225,15 @@ class ConfigManager:
     def __init__(self):
         self.config_dir = Path.home() / ".tess"
         self.config_file = self.config_dir / "config.json"
+        # Pickled config dict, reused while config.json is unchanged
+        self.cache_file = self.config_dir / "config.cache.pkl"
         self.config = TessConfig()
+        # Set by the mutator methods; direct attribute edits are caught by
+        # comparing against the last text written to disk.
+        self._dirty = False
+        self._saved_text: Optional[bytes] = None
+        self._created_paths: set = set()
+        self._scanned_config_dir = False
         self._ensure_directories()
         self._init_default_paths()
         
@@ -141,16 +249,32 @@ class ConfigManager:
         self.config.paths.temp_dir = str(self.config_dir / "temp")
         self.config.paths.vector_db = str(self.config_dir / "vector_db")
         self.config.paths.data_dir = str(self.config_dir / "data")
+        # Subdirectories are created on demand by ensure_path()
+    
+    def ensure_path(self, name: str) -> Path:
+        """
+        Return the configured directory for a PathConfig field
+        (e.g. "temp_dir"), creating it on first access.
+        """
+        if not self._scanned_config_dir:
+            self._scan_config_dir()
         
-        # Create subdirectories
-        for path in [self.config.paths.memory_dir, 
-                     self.config.paths.logs_dir,
-                     self.config.paths.skills_dir,
-                     self.config.paths.temp_dir,
-                     self.config.paths.vector_db,
-                     self.config.paths.data_dir]:
-            Path(path).mkdir(parents=True, exist_ok=True)
+        path = Path(getattr(self.config.paths, name))
+        if path not in self._created_paths:
+            path.mkdir(parents=True, exist_ok=True)
+            self._created_paths.add(path)
+        return path
+    
+    def _scan_config_dir(self):
+        """Record existing ~/.tess subdirectories with a single scandir."""
+        self._scanned_config_dir = True
+        try:
+            with os.scandir(self.config_dir) as it:
+                self._created_paths.update(Path(e.path) for e in it if e.is_dir())
+        except OSError:
+            pass
     
+    @measure
     def load(self) -> bool:
         """
         Load configuration from file.
@@ -158,71 +282,116 @@ class ConfigManager:
         """
         if not self.config_file.exists():
             return False
+        
+        if self._load_cache():
+            return True
             
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            # Parse nested structures
-            self.config = TessConfig(
-                llm=LLMConfig(**data.get('llm', {})),
-                security=SecurityConfig(**data.get('security', {})),
-                features=FeatureConfig(**data.get('features', {})),
-                paths=PathConfig(**data.get('paths', {})),
-                whatsapp=WhatsAppConfig(**data.get('whatsapp', {})),
-                google=GoogleConfig(**data.get('google', {})),
-                telegram_token=data.get('telegram_token', ''),
-                telegram_user_id=data.get('telegram_user_id', ''),
-                telegram_allowed_users=data.get('telegram_allowed_users', []),
-                first_run=data.get('first_run', False),
-                version=data.get('version', '1.0.0')
-            )
+            # Stamp before reading, so an edit during the read invalidates the cache
+            stamp = _file_stamp(self.config_file)
+            raw = self.config_file.read_bytes()
+            config = _decode_config(raw)
+            if config is None:
+                data = json.loads(raw)
+                config = _config_from_dict(data, data.get('first_run', False))
+            self.config = config
+            self._saved_text = raw
+            self._dirty = False
+            self._write_cache(stamp)
             return True
         except Exception as e:
             print(f"⚠️  Error loading config: {e}")
             return False
     
+    def _load_cache(self) -> bool:
+        """Load the cached config if it was made from the current config.json."""
+        try:
+            with open(self.cache_file, 'rb') as f:
+                tag, stamp, data = _DataUnpickler(f).load()
+            # Dataclass layout may differ between releases
+            if tag != _cache_tag() or stamp != _file_stamp(self.config_file):
+                return False
+            self.config = _config_from_dict(data, data['first_run'])
+            self._saved_text = None
+            self._dirty = False
+            return True
+        except Exception:
+            return False
+    
+    def _write_cache(self, stamp: tuple):
+        """
+        Refresh the config cache (best effort). Only builtins are pickled, and
+        the file is swapped in whole so a reader never sees a partial write.
+        """
+        try:
+            tmp_file = self.cache_file.with_suffix(".pkl.tmp")
+            with open(tmp_file, 'wb') as f:
+                pickle.dump((_cache_tag(), stamp, self._to_dict()), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.chmod(tmp_file, 0o600)
+            os.replace(tmp_file, self.cache_file)
+        except Exception:
+            pass
+    
+    def _invalidate_cache(self):
+        """Drop the pickled config so the next load re-reads config.json."""
+        try:
+            self.cache_file.unlink()
+        except OSError:
+            pass
+    
+    @measure
     def save(self) -> bool:
         """
         Save configuration to file.
         Returns True if successful.
         """
         try:
-            # Convert dataclass to dict
-            data = {
-                'llm': asdict(self.config.llm),
-                'security': asdict(self.config.security),
-                'features': asdict(self.config.features),
-                'paths': asdict(self.config.paths),
-                'whatsapp': asdict(self.config.whatsapp),
-                'google': asdict(self.config.google),
-                'telegram_token': self.config.telegram_token,
-                'telegram_user_id': self.config.telegram_user_id,
-                'telegram_allowed_users': self.config.telegram_allowed_users,
-                'first_run': self.config.first_run,
-                'version': self.config.version
-            }
+            data = self._to_dict()
+            
+            if orjson is not None:
+                text = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            else:
+                text = json.dumps(data, indent=2).encode('utf-8')
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2)
+            # Nothing changed since the last write
+            if not self._dirty and text == self._saved_text and self.config_file.exists():
+                return True
+            
+            # Write to a temp file and swap it in so a crash never leaves
+            # a truncated config.json behind
+            tmp_file = self.config_file.with_suffix(".json.tmp")
+            with open(tmp_file, 'wb') as f:
+                f.write(text)
             
             # Secure the config file (Windows)
             try:
-                os.chmod(self.config_file, 0o600)
+                os.chmod(tmp_file, 0o600)
             except Exception:
                 pass  # Windows may not support this
+            os.replace(tmp_file, self.config_file)
+            self._invalidate_cache()
+            
+            self._saved_text = text
+            self._dirty = False
             return True
         except Exception as e:
             print(f"❌ Error saving config: {e}")
             return False
     
+    def _to_dict(self) -> Dict[str, Any]:
+        """Convert the config to a JSON-serializable dict (one level per section)."""
+        return {
+            name: _shallow_dict(value) if is_dataclass(value) else value
+            for name, value in _shallow_dict(self.config).items()
+        }
+    
     def get_api_key(self, provider: str, index: int = 0) -> Optional[str]:
         """
         Get API key for a specific provider.
         Returns the key at the specified index (default: first key).
         Supports backward compatibility with old single-key format.
+        Provider names must be lowercase.
         """
-        provider = provider.lower()
         keys = self.config.llm.api_keys.get(provider)
         
         if not keys:
@@ -240,8 +409,7 @@ class ConfigManager:
         return None
     
     def get_all_api_keys(self, provider: str) -> List[str]:
-        """Get all API keys for a specific provider."""
-        provider = provider.lower()
+        """Get all API keys for a specific (lowercase) provider."""
         keys = self.config.llm.api_keys.get(provider, [])
         
         # Handle backward compatibility: convert single string to list
@@ -255,14 +423,15 @@ class ConfigManager:
         Set API key for a specific provider (replaces all keys).
         Use add_api_key() to add additional keys.
         """
-        self.config.llm.api_keys[provider.lower()] = [key]
+        self.config.llm.api_keys[sys.intern(provider.lower())] = [key]
+        self._dirty = True
     
     def add_api_key(self, provider: str, key: str) -> bool:
         """
         Add an additional API key for a specific provider.
         Returns True if added successfully.
         """
-        provider = provider.lower()
+        provider = sys.intern(provider.lower())
         existing = self.config.llm.api_keys.get(provider, [])
         
         # Handle backward compatibility
@@ -274,6 +443,7 @@ class ConfigManager:
         # Don't add duplicates
         if key not in existing:
             self.config.llm.api_keys[provider] = existing + [key]
+            self._dirty = True
             return True
         return False
     
@@ -288,12 +458,14 @@ class ConfigManager:
         if isinstance(keys, str):
             if index == 0:
                 self.config.llm.api_keys[provider] = []
+                self._dirty = True
                 return True
             return False
         
         if isinstance(keys, list) and 0 <= index < len(keys):
             keys.pop(index)
             self.config.llm.api_keys[provider] = keys
+            self._dirty = True
             return True
         return False
     
@@ -308,9 +480,9 @@ class ConfigManager:
             return False, "Key is too short or empty"
         
         # Basic format validation
-        if provider == "groq" and not key.startswith("gsk_"):
+        if provider == "groq" and key[:4] != "gsk_":
             return False, "Groq keys should start with 'gsk_'"
-        if provider == "openai" and not key.startswith("sk-"):
+        if provider == "openai" and key[:3] != "sk-":
             return False, "OpenAI keys should start with 'sk-'"
             
         return True, "Format looks valid"
@@ -319,12 +491,13 @@ class ConfigManager:
         """Reset configuration to defaults."""
         self.config = TessConfig()
         self._init_default_paths()
+        self._dirty = True
         
     def export_config(self, path: str) -> bool:
         """Export configuration to a specific path."""
         try:
             with open(path, 'w', encoding='utf-8') as f:
-                json.dump(asdict(self.config), f, indent=2)
+                json.dump(self._to_dict(), f, indent=2)
             return True
         except Exception as e:
             print(f"❌ Export failed: {e}")
@@ -340,19 +513,8 @@ class ConfigManager:
             if 'llm' not in data or 'security' not in data:
                 return False
                 
-            self.config = TessConfig(
-                llm=LLMConfig(**data.get('llm', {})),
-                security=SecurityConfig(**data.get('security', {})),
-                features=FeatureConfig(**data.get('features', {})),
-                paths=PathConfig(**data.get('paths', {})),
-                whatsapp=WhatsAppConfig(**data.get('whatsapp', {})),
-                google=GoogleConfig(**data.get('google', {})),
-                telegram_token=data.get('telegram_token', ''),
-                telegram_user_id=data.get('telegram_user_id', ''),
-                telegram_allowed_users=data.get('telegram_allowed_users', []),
-                first_run=False,
-                version=data.get('version', '1.0.0')
-            )
+            self.config = _config_from_dict(data, first_run=False)
+            self._dirty = True
             return True
         except Exception as e:
             print(f"❌ Import failed: {e}")
@@ -0,0 +1,49 @@
+"""
+Lazy module proxies for TESS Configurable Edition.
+"""
+
+import importlib
+import types
+from typing import Any, Dict, Optional, Tuple
+
+# (module, attribute) -> resolved object, for cached_import
+_IMPORT_CACHE: Dict[Tuple[str, str], Any] = {}
+
+
+class _LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name: str, package: Optional[str] = None):
+        super().__init__(name)
+        self._lazy_package = package
+
+    def __getattr__(self, attr):
+        # Only called for attributes not cached yet. A failed import raises
+        # ImportError here and is retried on the next access, like a normal import.
+        module = importlib.import_module(self.__name__, self._lazy_package)
+        value = getattr(module, attr)
+        setattr(self, attr, value)
+        return value
+
+
+def lazy_import(name: str, package: Optional[str] = None) -> types.ModuleType:
+    """
+    Return a proxy for module `name` that is imported on first use.
+
+    Looked-up attributes are cached on the proxy, so use it for classes and
+    functions, not for module-level state that is reassigned later.
+    """
+    return _LazyModule(name, package)
+
+
+def cached_import(module: str, name: str) -> Any:
+    """
+    Import and return `name` from `module`, resolving each pair only once.
+    Relative module names are resolved against tess_configurable.core.
+    """
+    key = (module, name)
+    value = _IMPORT_CACHE.get(key)
+    if value is None:
+        value = getattr(importlib.import_module(module, __package__), name)
+        _IMPORT_CACHE[key] = value
+    return value
@@ -3,27 +3,483 @@ Brain module for TESS Configurable Edition.
 Multi-provider LLM with failover support.
 """
 
+import ast
+import atexit
+import hashlib
 import json
+import os
+import queue
+import random
 import re
-from typing import Optional, Dict, Any, List
+import sys
+import threading
+import time
+import warnings
+from collections import OrderedDict, deque
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Deque, Tuple
 
-try:
-    from groq import Groq
-    from openai import OpenAI
+from ..config_manager import get_config_manager
+from ..profiling import measure
+
+# Lazy imports: provider SDKs pull in httpx, protobuf, grpc etc., so only the
+# SDK for the provider actually in use gets imported.
+Groq = None
+OpenAI = None
+genai = None
+GENAI_NEW = False
+TypeAdapter = None
+ValidationError = None
+TessAction = None
+_TESS_ACTION_ADAPTER = None
+
+# Listed in the correction prompt when validation fails
+_VALID_ACTIONS_STR = (
+    "launch_app, execute_command, browser_control, system_control, "
+    "file_op, whatsapp_op, youtube_op, task_op, web_search_op, "
+    "web_op, planner_op, organize_op, calendar_op, gmail_op, "
+    "code_op, memory_op, reply_op, teach_skill, run_skill, "
+    "research_op, converter_op, error"
+)
+
+# Exact-match response cache. Only used at near-deterministic temperatures,
+# where the same prompt reliably yields the same action.
+_RESPONSE_CACHE_SIZE = 512
+_RESPONSE_CACHE_TTL = 3600.0  # seconds
+_RESPONSE_CACHE_MAX_TEMPERATURE = 0.2
+# Never cached: replies answer from the current time and state, errors are transient
+_UNCACHEABLE_ACTIONS = frozenset({"error", "reply_op"})
+# The semantic cache replays a similar query's action with its arguments, so
+# only actions without free-form targets ("email Bob" vs "email Rob") qualify
+_SEMANTIC_CACHEABLE_ACTIONS = frozenset({"launch_app", "system_control"})
+
+# Responses are also persisted across runs when diskcache is installed
+_DISK_CACHE_SIZE = 256 * 1024 * 1024  # bytes
+
+# Semantic cache (llm.semantic_cache_enabled): paraphrases of a cached query
+# whose embedding cosine similarity reaches the threshold reuse its action.
+_SEMANTIC_CACHE_SIZE = 1024
+_SEMANTIC_CACHE_THRESHOLD = 0.92
+_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# Providers whose JSON mode can be streamed, letting a reply be handed to the
+# parser as soon as its top-level object closes. Groq rejects stream=True
+# together with response_format=json_object.
+_STREAM_JSON_PROVIDERS = frozenset({"openai", "deepseek"})
+
+# HTTP statuses worth retrying after a backoff; 401/403 mean a bad key and
+# go straight to rotation instead
+_RETRYABLE = frozenset({429, 500, 502, 503, 504})
+_AUTH_ERRORS = frozenset({401, 403})
+
+# Strips ```json ... ``` (or bare ```) fences around the JSON object
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+
+def _get_groq():
+    global Groq
+    if Groq is None:
+        from groq import Groq as G
+        Groq = G
+    return Groq
+
+
+def _get_openai():
+    global OpenAI
+    if OpenAI is None:
+        from openai import OpenAI as OA
+        OpenAI = OA
+    return OpenAI
+
+
+_http_client = None
+
+
+def _get_http_client():
+    """
+    Shared keep-alive connection pool for the OpenAI-compatible SDKs, so
+    failover and key rotation reuse open TLS connections.
+    """
+    global _http_client
+    if _http_client is None:
+        import httpx
+        try:
+            import h2  # httpx needs it for HTTP/2
+            http2 = True
+        except ImportError:
+            http2 = False
+        _http_client = httpx.Client(
+            http2=http2,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        )
+        atexit.register(_http_client.close)
+    return _http_client
+
+
+_disk_cache = None
+_disk_cache_failed = False
+
+
+def _get_disk_cache(directory):
+    """
+    Open the persistent response cache, or return None if diskcache is not
+    installed or the cache can't be opened.
+    """
+    global _disk_cache, _disk_cache_failed
+    if _disk_cache is None and not _disk_cache_failed:
+        try:
+            import diskcache
+            from diskcache.core import MODE_PICKLE
+            
+            class _NoPickleDisk(diskcache.Disk):
+                """Values are JSON strings; never unpickle what is in the cache dir."""
+                
+                def fetch(self, mode, filename, value, read):
+                    if mode == MODE_PICKLE:
+                        raise ValueError("refusing pickled cache entry")
+                    return super().fetch(mode, filename, value, read)
+            
+            _disk_cache = diskcache.Cache(
+                str(directory),
+                disk=_NoPickleDisk,
+                size_limit=_DISK_CACHE_SIZE,
+                eviction_policy="least-recently-used",
+            )
+        except ImportError:
+            _disk_cache_failed = True
+        except Exception as e:
+            print(f"[Brain] Persistent response cache disabled: {e}")
+            _disk_cache_failed = True
+    return _disk_cache
+
+
+_embedder = None
+np = None
+
+
+def _get_embedder():
+    """Load the local sentence embedding model (and numpy) on first use."""
+    global _embedder, np
+    if _embedder is None:
+        import numpy
+        from sentence_transformers import SentenceTransformer
+        np = numpy
+        _embedder = SentenceTransformer(_EMBEDDING_MODEL)
+    return _embedder
+
+
+def _get_genai():
+    global genai, GENAI_NEW
+    if genai is None:
+        # The Gemini SDKs emit deprecation/future warnings on import and use.
+        # Filter them once here rather than wrapping every call in
+        # warnings.catch_warnings(), which copies the filter list each time
+        # and is not thread-safe.
+        warnings.filterwarnings("ignore", module=r"google(\.|$)")
+        warnings.filterwarnings("ignore", module=__name__)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            try:
+                from google import genai as gm
+                GENAI_NEW = True
+            except ImportError:
+                import google.generativeai as gm
+                GENAI_NEW = False
+        genai = gm
+    return genai
+
+
+# OpenAI-compatible providers: name -> (client factory, default model).
+# Gemini uses its own SDK and is handled by Brain._make_gemini.
+_PROVIDERS = {
+    "groq": (
+        lambda key: _get_groq()(api_key=key, http_client=_get_http_client()),
+        "llama-3.3-70b-versatile",
+    ),
+    "openai": (
+        lambda key: _get_openai()(api_key=key, http_client=_get_http_client()),
+        "gpt-4o",
+    ),
+    "deepseek": (
+        lambda key: _get_openai()(api_key=key, base_url="https://api.deepseek.com", http_client=_get_http_client()),
+        "deepseek-chat",
+    ),
+}
+_GEMINI_MODEL = "gemini-2.0-flash"
+_KNOWN_PROVIDERS = frozenset(_PROVIDERS) | {"gemini"}
+
+
+def _default_model(provider: str) -> str:
+    """Model used when failing over to provider."""
+    return _GEMINI_MODEL if provider == "gemini" else _PROVIDERS[provider][1]
+
+# Fast tier: short, self-contained commands ("screenshot", "open chrome") go
+# to a small model with a tight token budget. Validation failures fall back
+# to the full model through the correction request.
+_FAST_MODELS = {"groq": "llama-3.1-8b-instant"}
+_FAST_MAX_TOKENS = 256
+_FAST_MAX_QUERY_LEN = 120
+_BIG_MODEL_HINTS = ("plan", "research", "trip", "analyze", "summar", "write", "code")
+# Follow-ups that lean on earlier turns need the full model to resolve them
+_CONTEXT_WORDS = frozenset({"it", "that", "this", "them", "those", "again", "same", "previous", "last"})
+
+# How long a provider whose keys all hit rate limits is skipped in failover;
+# rejected keys (401/403) stay skipped for the session
+_RATE_LIMITED_COOLDOWN = 60.0  # seconds
+
+# Published Groq free-tier limits per model; llm.rate_limits overrides or
+# extends these ({"model": {"tpm": ..., "rpm": ...}}). Models without limits
+# are not throttled.
+_DEFAULT_RATE_LIMITS = {
+    "llama-3.3-70b-versatile": {"tpm": 12000, "rpm": 30},
+    "llama-3.1-8b-instant": {"tpm": 6000, "rpm": 30},
+}
+# Stay under the limit rather than on it
+_RATE_LIMIT_HEADROOM = 0.9
+
+# Failover order
+_PROVIDER_ORDER = ("groq", "openai", "deepseek", "gemini")
+_PROVIDER_IDX = {p: i for i, p in enumerate(_PROVIDER_ORDER)}
+
+
+def _error_status(e: Exception) -> Optional[int]:
+    """HTTP status of a provider SDK error, if it carries one."""
+    # groq/openai APIStatusError expose status_code; google.api_core errors expose code
+    status = getattr(e, "status_code", None)
+    if status is None:
+        status = getattr(e, "code", None)
+    return status if isinstance(status, int) else None
+
+
+def _is_connection_error(e: Exception) -> bool:
+    """True for network failures and timeouts from any loaded provider SDK."""
+    for name in ("groq", "openai"):
+        sdk = sys.modules.get(name)
+        if sdk is not None and isinstance(e, sdk.APIConnectionError):
+            return True
+    return isinstance(e, (ConnectionError, TimeoutError))
+
+
+def _classify_error(e: Exception) -> str:
+    """Classify a request error as "auth", "rate", "retry" or "fatal"."""
+    status = _error_status(e)
+    if status in _AUTH_ERRORS:
+        return "auth"
+    if status == 429:
+        return "rate"
+    if status in _RETRYABLE or _is_connection_error(e):
+        return "retry"
+    if status is None:
+        # Errors without a status (e.g. Gemini quota messages)
+        msg = str(e).lower()
+        if "rate limit" in msg or "quota" in msg:
+            return "rate"
+    return "fatal"
+
+
+def _backoff_delay(attempt: int, base: float = 1.0) -> float:
+    """Exponential backoff with up to 50% jitter, capped at 30s before jitter."""
+    return min(30.0, base * (2 ** attempt)) * (1 + random.random() * 0.5)
+
+
+_token_encoder = None
+
+
+def _estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Estimate prompt tokens, with tiktoken when installed, else ~4 chars per token."""
+    global _token_encoder
+    if _token_encoder is None:
+        try:
+            import tiktoken
+            _token_encoder = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _token_encoder = False
+    if _token_encoder:
+        return sum(len(_token_encoder.encode(m["content"])) + 4 for m in messages)
+    return sum(len(m["content"]) // 4 + 4 for m in messages)
+
+
+class _TokenBudget:
+    """
+    Sliding 60s window of requests and tokens per model, so requests wait
+    for quota instead of drawing 429s.
+    """
+    
+    WINDOW = 60.0
+    
+    def __init__(self, limits: Dict[str, Dict[str, int]]):
+        self.limits = limits
+        self.windows: Dict[str, Deque[List]] = {}
+        self.lock = threading.Lock()
+    
+    def acquire(self, model: str, tokens: int) -> Optional[List]:
+        """
+        Block until a request of about `tokens` fits the model's limits, then
+        record it. Returns the window entry for record(), or None if unlimited.
+        """
+        limit = self.limits.get(model)
+        if not limit:
+            return None
+        tpm = limit.get("tpm", 0) * _RATE_LIMIT_HEADROOM
+        rpm = limit.get("rpm", 0) * _RATE_LIMIT_HEADROOM
+        
+        while True:
+            with self.lock:
+                window = self.windows.setdefault(model, deque())
+                now = time.monotonic()
+                while window and now - window[0][0] >= self.WINDOW:
+                    window.popleft()
+                used = sum(entry[1] for entry in window)
+                # An empty window always admits, even a request over the limit
+                if not window or (
+                    (not tpm or used + tokens <= tpm) and (not rpm or len(window) + 1 <= rpm)
+                ):
+                    entry = [now, tokens]
+                    window.append(entry)
+                    return entry
+                wait = self.WINDOW - (now - window[0][0])
+            print(f"[Brain] Waiting {wait:.1f}s for {model} rate limit")
+            time.sleep(wait)
+    
+    def record(self, entry: Optional[List], tokens: int):
+        """Replace the estimate for a request with its actual token usage."""
+        if entry is not None:
+            with self.lock:
+                entry[1] = tokens
+
+
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+def _outer_object(text: str) -> str:
+    """Cut text down to its outermost {...}, adding braces that are missing."""
+    start = text.find("{")
+    if start < 0:
+        return "{" + text.strip() + "}"
+    end = text.rfind("}")
+    if end < start:
+        return text[start:] + "}"
+    return text[start:end + 1]
+
+
+def _repair_strip(text: str) -> Optional[str]:
+    return _outer_object(text)
+
+
+def _repair_trailing_commas(text: str) -> Optional[str]:
+    return _TRAILING_COMMA_RE.sub(r"\1", _outer_object(text))
+
+
+def _repair_python_literal(text: str) -> Optional[str]:
+    """Single quotes, True/False/None: parse as a Python literal instead."""
     try:
-        from google import genai
-        GENAI_NEW = True
+        data = ast.literal_eval(_repair_trailing_commas(text))
+    except Exception:
+        return None
+    return json.dumps(data) if isinstance(data, dict) else None
+
+
+def _repair_with_library(text: str) -> Optional[str]:
+    try:
+        from json_repair import repair_json
     except ImportError:
-        import google.generativeai as genai
-        GENAI_NEW = False
-    from pydantic import TypeAdapter, ValidationError
-except ImportError as e:
-    print(f"Missing dependency: {e}")
-    print("Run: pip install groq openai google-generativeai pydantic")
-    raise
+        return None
+    return repair_json(text)
 
-from ..config_manager import get_config_manager
-from .schemas import TessAction
+
+# Local fixes for malformed JSON, tried before paying for an LLM correction
+_JSON_REPAIRS = (_repair_strip, _repair_trailing_commas, _repair_python_literal, _repair_with_library)
+
+
+def _needs_big_model(query: str) -> bool:
+    """Heuristic: True unless the query is a short, self-contained command."""
+    if len(query) > _FAST_MAX_QUERY_LEN:
+        return True
+    q = query.lower()
+    if any(hint in q for hint in _BIG_MODEL_HINTS):
+        return True
+    return not _CONTEXT_WORDS.isdisjoint(q.split())
+
+
+class _JsonObjectScanner:
+    """
+    Tracks brace depth over streamed text, ignoring braces inside JSON
+    strings, to spot where the first top-level object ends.
+    """
+    
+    __slots__ = ("depth", "in_string", "escaped", "start", "offset")
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.start = -1   # absolute index of the opening brace
+        self.offset = 0   # characters consumed so far
+    
+    def feed(self, text: str) -> int:
+        """Consume text; return the absolute index just past the closing brace, or -1."""
+        base = self.offset
+        self.offset += len(text)
+        for i, ch in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                if self.depth:
+                    self.in_string = True
+            elif ch == "{":
+                if self.start < 0:
+                    self.start = base + i
+                self.depth += 1
+            elif ch == "}" and self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    return base + i + 1
+        return -1
+
+
+def _collect_json_stream(pieces) -> str:
+    """
+    Join streamed text pieces, stopping as soon as the first JSON object is
+    complete. Returns just that object, or all text if none closes.
+    """
+    scanner = _JsonObjectScanner()
+    parts = []
+    for piece in pieces:
+        if not piece:
+            continue
+        parts.append(piece)
+        end = scanner.feed(piece)
+        if end >= 0:
+            return "".join(parts)[scanner.start:end]
+    return "".join(parts)
+
+
+_validation_lock = threading.Lock()
+
+
+def _load_validation():
+    """Import pydantic and build the TessAction validator on first parse."""
+    global TypeAdapter, ValidationError, TessAction, _TESS_ACTION_ADAPTER
+    if _TESS_ACTION_ADAPTER is not None:
+        return
+    # May race with the background warm-up started by generate_command
+    with _validation_lock:
+        if _TESS_ACTION_ADAPTER is None:
+            from pydantic import TypeAdapter as TA, ValidationError as VE
+            from .schemas import TessAction as TAct
+            ValidationError = VE
+            TessAction = TAct
+            TypeAdapter = TA
+            # Building the adapter compiles the core schema, so do it once
+            _TESS_ACTION_ADAPTER = TA(TAct)
 
 
 class Brain:
@@ -38,10 +494,25 @@ class Brain:
         self.config_mgr = get_config_manager()
         self.config = self.config_mgr.config
         
-        self.history: List[Dict[str, str]] = []
+        # Bounded so truncation is O(1) on append
+        self.history: Deque[Dict[str, str]] = deque(maxlen=20)
+        # Clients are built on first request by _ensure_client()
         self.client = None
         self.gemini_client = None
-        self.deepseek_client = None
+        # SDK clients keyed by (provider, api_key, model); built at most once
+        self._client_cache: Dict[Tuple[str, str, str], Any] = {}
+        self._gemini_key: Optional[str] = None
+        
+        # Response cache: key -> (expires_at, raw_response, action), in LRU order
+        self._response_cache: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Semantic cache: L2-normalized query embeddings, one row per entry,
+        # with (raw_response, action) pairs at the same index
+        self._emb_matrix = None
+        self._emb_entries: List[Tuple[str, Dict[str, Any]]] = []
+        self._semantic_failed = False
+        self._semantic_loaded = False
+        self._semantic_dirty = False
         
         # Provider state
         self.current_provider = self.config.llm.provider.lower()
@@ -50,13 +521,17 @@ class Brain:
         # Key rotation state: track current key index per provider
         self._key_indices: Dict[str, int] = {}
         self._exhausted_keys: Dict[str, set] = {}  # Track exhausted keys per provider
-        
-        # Initialize primary client
-        self._init_clients()
+        # Provider -> index into _JSON_REPAIRS that last fixed its output
+        self._repair_hints: Dict[str, int] = {}
+        # Proactive rate limiting per model
+        self._budget = _TokenBudget({**_DEFAULT_RATE_LIMITS, **self.config.llm.rate_limits})
+        # Providers with no usable key left -> monotonic time they may be retried
+        self._dead_providers: Dict[str, float] = {}
+        # Set after a provider failover: the next request races two providers
+        self._race_next = False
         
     def _get_current_key(self, provider: str) -> Optional[str]:
         """Get the current key for a provider, accounting for rotation."""
-        provider = provider.lower()
         keys = self.config_mgr.get_all_api_keys(provider)
         
         if not keys:
@@ -77,7 +552,6 @@ class Brain:
         Rotate to the next available key for the same provider.
         Returns True if a new key is available, False if all keys exhausted.
         """
-        provider = provider.lower()
         keys = self.config_mgr.get_all_api_keys(provider)
         
         if len(keys) <= 1:
@@ -104,98 +578,103 @@ class Brain:
         print(f"[Brain] All keys exhausted for {provider}")
         return False
     
+    def _mark_dead(self, provider: str, kind: str):
+        """Skip provider in failover: for a cooldown after rate limits, for good after auth errors."""
+        until = float("inf") if kind == "auth" else time.monotonic() + _RATE_LIMITED_COOLDOWN
+        self._dead_providers[provider] = until
+    
+    def _is_dead(self, provider: str) -> bool:
+        """True if provider's keys were all exhausted recently."""
+        until = self._dead_providers.get(provider)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._dead_providers[provider]
+            return False
+        return True
+    
     def _reset_key_rotation(self, provider: str):
         """Reset key rotation state for a provider (e.g., after successful request)."""
-        provider = provider.lower()
         if provider in self._exhausted_keys:
             del self._exhausted_keys[provider]
+        self._dead_providers.pop(provider, None)
+    
+    def _make_gemini(self, key: str, model: str):
+        """Return a Gemini model client, configuring the SDK for this key."""
+        # genai.configure() is process-global, so redo it whenever the key changes
+        if self._gemini_key != key:
+            _get_genai().configure(api_key=key)
+            self._gemini_key = key
+        
+        cache_key = ("gemini", key, model)
+        client = self._client_cache.get(cache_key)
+        if client is None:
+            client = _get_genai().GenerativeModel(model)
+            self._client_cache[cache_key] = client
+        return client
+    
+    def _make_client(self, provider: str, key: str):
+        """Return an OpenAI-compatible client for provider/key, reusing a cached one."""
+        cache_key = (provider, key, "")
+        client = self._client_cache.get(cache_key)
+        if client is None:
+            client = _PROVIDERS[provider][0](key)
+            self._client_cache[cache_key] = client
+        return client
+    
+    def _client_for(self, provider: str, key: str, model: str):
+        """Return the (cached) client for any known provider."""
+        if provider == "gemini":
+            return self._make_gemini(key, model)
+        return self._make_client(provider, key)
+    
+    def _set_active_client(self, provider: str, client):
+        """Make client the one used for provider's requests."""
+        if provider == "gemini":
+            self.gemini_client = client
+        else:
+            self.client = client
+    
+    def _build_client(self, provider: str, key: str, model: str):
+        """Set the active client attribute for provider from the client cache."""
+        self._set_active_client(provider, self._client_for(provider, key, model))
+    
+    def _ensure_client(self) -> bool:
+        """Build the current provider's client on first use."""
+        provider = self.current_provider
+        active = self.gemini_client if provider == "gemini" else self.client
+        if active is not None:
+            return True
+        
+        key = self._get_current_key(provider)
+        if not key or provider not in _KNOWN_PROVIDERS:
+            return False
+        
+        try:
+            self._build_client(provider, key, self.current_model)
+            return True
+        except Exception as e:
+            print(f"Failed to init {provider}: {e}")
+            return False
     
     def _reinit_client(self, provider: str):
         """Reinitialize client with current key for provider."""
-        provider = provider.lower()
         key = self._get_current_key(provider)
         
         if not key:
             return
         
         try:
-            if provider == "groq":
-                self.client = Groq(api_key=key)
-            elif provider == "openai":
-                self.client = OpenAI(api_key=key)
-            elif provider == "deepseek":
-                self.client = OpenAI(api_key=key, base_url="https://api.deepseek.com")
-            elif provider == "gemini":
-                import warnings
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    genai.configure(api_key=key)
-                    self.gemini_client = genai.GenerativeModel(self.current_model)
+            self._build_client(provider, key, self.current_model)
         except Exception as e:
             print(f"[Brain] Failed to reinit {provider}: {e}")
     
-    def _init_clients(self):
-        """Initialize LLM clients based on configuration."""
-        # Try to initialize primary provider
-        provider = self.current_provider
-        key = self._get_current_key(provider)
-        
-        if provider == "groq" and key:
-            try:
-                self.client = Groq(api_key=key)
-            except Exception as e:
-                print(f"Failed to init Groq: {e}")
-                
-        elif provider == "openai" and key:
-            try:
-                self.client = OpenAI(api_key=key)
-            except Exception as e:
-                print(f"Failed to init OpenAI: {e}")
-                
-        elif provider == "deepseek" and key:
-            try:
-                self.client = OpenAI(api_key=key, base_url="https://api.deepseek.com")
-            except Exception as e:
-                print(f"Failed to init DeepSeek: {e}")
-                
-        elif provider == "gemini" and key:
-            try:
-                import warnings
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    genai.configure(api_key=key)
-                    self.gemini_client = genai.GenerativeModel(self.current_model)
-            except Exception as e:
-                print(f"Failed to init Gemini: {e}")
-        
-        # Initialize backup clients
-        self._init_backup_clients()
-    
-    def _init_backup_clients(self):
-        """Initialize backup LLM clients."""
-        # DeepSeek backup
-        ds_key = self._get_current_key("deepseek")
-        if ds_key and self.current_provider != "deepseek":
-            try:
-                self.deepseek_client = OpenAI(api_key=ds_key, base_url="https://api.deepseek.com")
-            except Exception:
-                pass
-        
-        # Gemini backup
-        gem_key = self._get_current_key("gemini")
-        if gem_key and self.current_provider != "gemini":
-            try:
-                import warnings
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    genai.configure(api_key=gem_key)
-                    self.gemini_client = genai.GenerativeModel('gemini-2.0-flash')
-            except Exception:
-                pass
-    
     def _switch_provider(self, new_provider: str) -> bool:
         """Switch to a different provider."""
         new_provider = new_provider.lower()
+        if new_provider not in _KNOWN_PROVIDERS:
+            return False
+        
         key = self._get_current_key(new_provider)
         
         if not key:
@@ -205,41 +684,34 @@ class Brain:
         self._reset_key_rotation(new_provider)
         self._key_indices[new_provider] = 0
         
-        if new_provider == "groq":
-            self.client = Groq(api_key=key)
-            self.current_model = "llama-3.3-70b-versatile"
-        elif new_provider == "openai":
-            self.client = OpenAI(api_key=key)
-            self.current_model = "gpt-4o"
-        elif new_provider == "deepseek":
-            self.client = OpenAI(api_key=key, base_url="https://api.deepseek.com")
-            self.current_model = "deepseek-chat"
-        elif new_provider == "gemini":
-            import warnings
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                genai.configure(api_key=key)
-                self.gemini_client = genai.GenerativeModel('gemini-2.0-flash')
-            self.current_model = "gemini-2.0-flash"
-        else:
+        model = _default_model(new_provider)
+        try:
+            self._build_client(new_provider, key, model)
+        except ImportError as e:
+            print(f"[Brain] Cannot switch to {new_provider}: {e}")
             return False
         
         self.current_provider = new_provider
+        self.current_model = model
         return True
     
     def _try_next_provider(self) -> bool:
         """Try to switch to the next available provider."""
-        providers = ["groq", "openai", "deepseek", "gemini"]
-        current_idx = providers.index(self.current_provider) if self.current_provider in providers else -1
+        start = _PROVIDER_IDX.get(self.current_provider, -1) + 1
         
-        # Try remaining providers
-        for i in range(current_idx + 1, len(providers)):
-            if self._switch_provider(providers[i]):
-                print(f"[Brain] Switched to {providers[i]}")
+        # Try remaining providers that have a key configured and aren't exhausted
+        candidates = [
+            p for p in _PROVIDER_ORDER[start:]
+            if not self._is_dead(p) and self.config_mgr.get_all_api_keys(p)
+        ]
+        for provider in candidates:
+            if self._switch_provider(provider):
+                print(f"[Brain] Switched to {provider}")
                 return True
         
         return False
     
+    @measure
     def generate_command(self, user_query: str) -> Dict[str, Any]:
         """
         Generate an action from user query.
@@ -256,36 +728,80 @@ class Brain:
         # Build messages
         messages = [
             {"role": "system", "content": system_prompt},
-            *self.history[-5:],  # Last 5 exchanges
+            *islice(self.history, max(0, len(self.history) - 5), None),  # Last 5 messages
             {"role": "user", "content": user_query}
         ]
         
+        # Serve repeated commands without a network round-trip
+        cache_key = None
+        if self.config.llm.temperature <= _RESPONSE_CACHE_MAX_TEMPERATURE:
+            cache_key = self._response_cache_key(messages)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                raw_response, action = cached
+                self.history.append({"role": "user", "content": user_query})
+                self.history.append({"role": "assistant", "content": raw_response})
+                return action
+        
+        query_emb = self._embed_query(user_query)
+        if query_emb is not None:
+            cached = self._semantic_get(query_emb)
+            if cached is not None:
+                raw_response, action = cached
+                self.history.append({"role": "user", "content": user_query})
+                self.history.append({"role": "assistant", "content": raw_response})
+                return action
+        
+        fast = not _needs_big_model(user_query)
+        
+        # Importing pydantic and compiling the TessAction schema takes a while;
+        # on the first command, do it while the request is in flight
+        if _TESS_ACTION_ADAPTER is None:
+            threading.Thread(target=_load_validation, daemon=True).start()
+        
         # Try request with key rotation and provider failover
         max_retries = 6  # Increased to allow for key rotation + provider failover
+        last_error = None
         for attempt in range(max_retries):
             try:
-                raw_response = self._request_completion(messages)
+                if self._race_next:
+                    raw_response = self._race_completion(messages, fast=fast)
+                else:
+                    raw_response = self._request_completion(messages, fast=fast)
                 if raw_response:
                     # Reset key rotation on success
                     self._reset_key_rotation(self.current_provider)
                     break
             except Exception as e:
-                err_str = str(e).lower()
-                # Check for rate limit or auth errors
-                if "rate limit" in err_str or "429" in err_str or "401" in err_str or "quota" in err_str:
+                last_error = e
+                kind = _classify_error(e)
+                if kind in ("auth", "rate"):
+                    # A race can fail on a provider other than the current one
+                    failed = getattr(e, "provider", None) or self.current_provider
                     # First try rotating to next key for same provider
-                    if self._rotate_key(self.current_provider):
-                        print(f"[Brain] Retrying with rotated key for {self.current_provider}")
+                    if self._rotate_key(failed):
+                        print(f"[Brain] Retrying with rotated key for {failed}")
                         continue
                     # If all keys exhausted, try next provider
+                    self._mark_dead(failed, kind)
                     if self._try_next_provider():
+                        self._race_next = True
                         continue
+                    # Retrying a rejected key cannot succeed
+                    if kind == "auth":
+                        return {"action": "error", "reason": f"All providers failed: {e}"}
                 # For other errors, try a different provider
                 elif attempt < 2 and self._try_next_provider():
+                    self._race_next = True
                     continue
-                if attempt == max_retries - 1:
-                    return {"action": "error", "reason": f"All providers failed: {e}"}
+                
+                # Same provider and key again: back off so we don't re-hit the same
+                # quota window or overloaded backend
+                if kind != "fatal" and attempt < max_retries - 1:
+                    time.sleep(_backoff_delay(attempt, 0.25 if _is_connection_error(e) else 1.0))
         else:
+            if last_error is not None:
+                return {"action": "error", "reason": f"All providers failed: {last_error}"}
             return {"action": "error", "reason": "No response from LLM"}
         
         # Update history
@@ -293,99 +809,373 @@ class Brain:
         self.history.append({"role": "assistant", "content": raw_response})
         
         # Parse and validate
-        return self._parse_and_validate(raw_response)
+        action = self._parse_and_validate(raw_response)
+        if action.get("action") not in _UNCACHEABLE_ACTIONS:
+            if cache_key is not None:
+                self._cache_put(cache_key, raw_response, action)
+            if query_emb is not None:
+                self._semantic_put(query_emb, raw_response, action)
+        return action
     
-    def _request_completion(self, messages: List[Dict], json_mode: bool = True) -> Optional[str]:
-        """Make LLM request with current provider."""
+    def _response_cache_key(self, messages: List[Dict[str, str]]) -> str:
+        """Hash everything that determines the completion for this request."""
+        payload = json.dumps({
+            "provider": self.current_provider,
+            "model": self.current_model,
+            "temp": self.config.llm.temperature,
+            "messages": messages,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return (raw_response, action) for key, or None if missing or expired."""
+        with self._cache_lock:
+            entry = self._response_cache.get(key)
+            if entry is not None:
+                expires_at, raw_response, action = entry
+                if expires_at < time.monotonic():
+                    del self._response_cache[key]
+                    entry = None
+                else:
+                    self._response_cache.move_to_end(key)
+        
+        if entry is None:
+            # Fall back to entries saved by earlier sessions
+            disk = _get_disk_cache(self.config_mgr.config_dir / "llm_cache")
+            if disk is None:
+                return None
+            try:
+                stored = disk.get(key)
+                if stored is None:
+                    return None
+                raw_response, action = json.loads(stored)
+            except Exception:
+                return None  # unreadable or old-format entry; treat as a miss
+            if not isinstance(action, dict) or action.get("action") in _UNCACHEABLE_ACTIONS:
+                return None  # malformed, or a reply saved before replies were excluded
+            self._cache_put(key, raw_response, action, persist=False)
+        
+        # Callers may mutate the action, so hand out a copy
+        return raw_response, dict(action)
+    
+    def _embed_query(self, user_query: str):
+        """Return the normalized embedding of user_query, or None if the semantic cache is off."""
+        if not self.config.llm.semantic_cache_enabled or self._semantic_failed:
+            return None
+        try:
+            # First use downloads the model, so offline or hub errors land here too
+            model = _get_embedder()
+            emb = model.encode([user_query], normalize_embeddings=True)[0].astype(np.float32)
+        except Exception as e:
+            print(f"[Brain] Semantic cache disabled: {e}")
+            self._semantic_failed = True
+            return None
+        if not self._semantic_loaded:
+            self._semantic_loaded = True
+            self._load_semantic_index()
+            atexit.register(self._save_semantic_index)
+        return emb
+    
+    def _semantic_get(self, query_emb) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return the cached (raw_response, action) most similar to query_emb above the threshold."""
+        with self._cache_lock:
+            if self._emb_matrix is None:
+                return None
+            # Rows and query are unit vectors, so one GEMV gives cosine similarities
+            sims = self._emb_matrix @ query_emb
+            best = int(sims.argmax())
+            if sims[best] < _SEMANTIC_CACHE_THRESHOLD:
+                return None
+            raw_response, action = self._emb_entries[best]
+        return raw_response, dict(action)
+    
+    def _semantic_put(self, query_emb, raw_response: str, action: Dict[str, Any]):
+        """Append an entry to the semantic cache, dropping the oldest past the size limit."""
+        if action.get("action") not in _SEMANTIC_CACHEABLE_ACTIONS:
+            return
+        with self._cache_lock:
+            row = query_emb[np.newaxis, :]
+            if self._emb_matrix is None:
+                self._emb_matrix = row
+            else:
+                self._emb_matrix = np.vstack((self._emb_matrix, row))[-_SEMANTIC_CACHE_SIZE:]
+            self._emb_entries.append((raw_response, dict(action)))
+            del self._emb_entries[:-_SEMANTIC_CACHE_SIZE]
+            self._semantic_dirty = True
+    
+    def _semantic_index_paths(self) -> Tuple[Path, Path]:
+        """Paths of the saved embedding matrix and its entries."""
+        config_dir = self.config_mgr.config_dir
+        return config_dir / "semantic_index.npy", config_dir / "semantic_index.json"
+    
+    def _load_semantic_index(self):
+        """Load the semantic cache saved by an earlier session, memory-mapping the matrix."""
+        matrix_path, entries_path = self._semantic_index_paths()
+        try:
+            with open(entries_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("model") != _EMBEDDING_MODEL:
+                return
+            entries = [(raw, action) for raw, action in data["entries"]]
+            matrix = np.load(matrix_path, mmap_mode="r")
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        if matrix.ndim != 2 or matrix.shape[0] != len(entries):
+            return
+        # Drop entries saved before their actions were excluded from caching
+        keep = [i for i, (_, action) in enumerate(entries)
+                if action.get("action") in _SEMANTIC_CACHEABLE_ACTIONS]
+        if len(keep) < len(entries):
+            matrix = np.asarray(matrix[keep])
+            entries = [entries[i] for i in keep]
+            self._semantic_dirty = True
+            if not entries:
+                return
+        with self._cache_lock:
+            self._emb_matrix = matrix
+            self._emb_entries = entries
+    
+    def _save_semantic_index(self):
+        """Write the semantic cache to disk if it changed this session."""
+        with self._cache_lock:
+            if not self._semantic_dirty or self._emb_matrix is None:
+                return
+            matrix = np.ascontiguousarray(self._emb_matrix)
+            entries = list(self._emb_entries)
+        
+        matrix_path, entries_path = self._semantic_index_paths()
+        try:
+            tmp = matrix_path.with_name(matrix_path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, matrix)
+            os.replace(tmp, matrix_path)
+            tmp = entries_path.with_name(entries_path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"model": _EMBEDDING_MODEL, "entries": entries}, f)
+            os.replace(tmp, entries_path)
+            self._semantic_dirty = False
+        except OSError as e:
+            print(f"[Brain] Could not save semantic cache: {e}")
+    
+    def _cache_put(self, key: str, raw_response: str, action: Dict[str, Any], persist: bool = True):
+        """Store a validated action, evicting the least recently used entry."""
+        if action.get("action") in _UNCACHEABLE_ACTIONS:
+            return
+        with self._cache_lock:
+            self._response_cache[key] = (time.monotonic() + _RESPONSE_CACHE_TTL, raw_response, dict(action))
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > _RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+        
+        if persist:
+            disk = _get_disk_cache(self.config_mgr.config_dir / "llm_cache")
+            if disk is not None:
+                try:
+                    disk.set(key, json.dumps([raw_response, action]), expire=_RESPONSE_CACHE_TTL)
+                except Exception:
+                    pass  # the in-memory entry is enough for this session
+    
+    @measure
+    def _request_completion(self, messages: List[Dict], json_mode: bool = True,
+                            fast: bool = False) -> Optional[str]:
+        """
+        Make LLM request with current provider.
+        
+        With fast=True, use the provider's small model (if it has one) and a
+        short token budget.
+        """
+        if not self._ensure_client():
+            return None
+        
         if self.current_provider == "gemini":
             return self._request_gemini(messages, json_mode)
         
         if not self.client:
             return None
         
+        model, max_tokens = self.current_model, None
+        fast_model = _FAST_MODELS.get(self.current_provider) if fast else None
+        if fast_model:
+            model, max_tokens = fast_model, _FAST_MAX_TOKENS
+        
+        stream = json_mode and self.current_provider in _STREAM_JSON_PROVIDERS
+        return self._request_openai(self.client, model, messages, json_mode, stream, max_tokens)
+    
+    def _request_openai(self, client, model: str, messages: List[Dict], json_mode: bool = True,
+                        stream: bool = False, max_tokens: Optional[int] = None) -> Optional[str]:
+        """Make request with an OpenAI-compatible client."""
         response_format = {"type": "json_object"} if json_mode else None
         
-        response = self.client.chat.completions.create(
-            model=self.current_model,
+        budget_entry = self._budget.acquire(model, _estimate_tokens(messages))
+        response = client.chat.completions.create(
+            model=model,
             messages=messages,
             temperature=self.config.llm.temperature,
-            max_tokens=self.config.llm.max_tokens,
-            response_format=response_format
+            max_tokens=max_tokens or self.config.llm.max_tokens,
+            response_format=response_format,
+            stream=stream
         )
         
-        return response.choices[0].message.content
+        if not stream:
+            if response.usage is not None:
+                self._budget.record(budget_entry, response.usage.total_tokens)
+            return response.choices[0].message.content
+        
+        # Stop reading once the JSON object is complete; closing the stream
+        # drops the remaining tokens instead of waiting for them
+        try:
+            return _collect_json_stream(
+                chunk.choices[0].delta.content for chunk in response if chunk.choices
+            )
+        finally:
+            response.close()
+    
+    def _race_candidates(self) -> List[Tuple[str, str, Any]]:
+        """Return (provider, model, client) for the primary provider and the first backup with a key."""
+        primary = self.config.llm.provider.lower()
+        candidates = []
+        for provider in (primary, *_PROVIDER_ORDER):
+            if len(candidates) == 2:
+                break
+            if provider not in _KNOWN_PROVIDERS or self._is_dead(provider):
+                continue
+            if any(c[0] == provider for c in candidates):
+                continue
+            key = self._get_current_key(provider)
+            if not key:
+                continue
+            model = self.config.llm.model if provider == primary else _default_model(provider)
+            try:
+                client = self._client_for(provider, key, model)
+            except Exception as e:
+                print(f"Failed to init {provider}: {e}")
+                continue
+            candidates.append((provider, model, client))
+        return candidates
     
-    def _request_gemini(self, messages: List[Dict], json_mode: bool = True) -> Optional[str]:
+    def _race_completion(self, messages: List[Dict], fast: bool = False) -> Optional[str]:
+        """
+        Send the request to the primary and one backup provider at once and
+        return the first successful reply, switching to whichever answered.
+        
+        Used once after a failover so a struggling primary costs only the
+        faster provider's latency instead of timeout plus retry. If both fail,
+        the raised error carries the provider that sent it as `.provider`.
+        """
+        self._race_next = False
+        candidates = self._race_candidates()
+        if len(candidates) < 2:
+            return self._request_completion(messages, fast=fast)
+        
+        results: "queue.Queue[Tuple[str, str, Any, Optional[str], Optional[Exception]]]" = queue.Queue()
+        
+        def worker(provider: str, model: str, client):
+            try:
+                if provider == "gemini":
+                    reply = self._request_gemini(messages, client=client)
+                else:
+                    # Same small-model routing as _request_completion
+                    request_model, max_tokens = model, None
+                    fast_model = _FAST_MODELS.get(provider) if fast else None
+                    if fast_model:
+                        request_model, max_tokens = fast_model, _FAST_MAX_TOKENS
+                    reply = self._request_openai(client, request_model, messages,
+                                                 stream=provider in _STREAM_JSON_PROVIDERS,
+                                                 max_tokens=max_tokens)
+                results.put((provider, model, client, reply, None))
+            except Exception as e:
+                try:
+                    e.provider = provider
+                except AttributeError:
+                    pass
+                results.put((provider, model, client, None, e))
+        
+        # Daemon threads: the slower request is abandoned, not awaited
+        for candidate in candidates:
+            threading.Thread(target=worker, args=candidate, daemon=True).start()
+        
+        error = None
+        for _ in candidates:
+            provider, model, client, reply, err = results.get()
+            if reply:
+                if provider != self.current_provider:
+                    print(f"[Brain] {provider} answered first, switching")
+                    self._reset_key_rotation(provider)
+                self.current_provider = provider
+                self.current_model = model
+                self._set_active_client(provider, client)
+                return reply
+            error = err or error
+        
+        if error:
+            raise error
+        return None
+    
+    def _request_gemini(self, messages: List[Dict], json_mode: bool = True, client=None) -> Optional[str]:
         """Make request to Gemini API."""
-        if not self.gemini_client:
+        client = client or self.gemini_client
+        if not client:
             return None
         
-        import warnings
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            
-            # Convert messages to Gemini format
-            history = []
-            system_msg = ""
-            
-            for msg in messages:
-                if msg["role"] == "system":
-                    system_msg = msg["content"]
-                elif msg["role"] == "user":
-                    history.append({"role": "user", "parts": [msg["content"]]})
-                elif msg["role"] == "assistant":
-                    history.append({"role": "model", "parts": [msg["content"]]})
-            
-            chat = self.gemini_client.start_chat(history=history[:-1] if history else [])
-            
-            last_msg = history[-1]["parts"][0] if history else ""
-            if system_msg and json_mode:
-                last_msg = f"{system_msg}\n\nRespond in JSON.\n\n{last_msg}"
-            
-            response = chat.send_message(last_msg)
-            return response.text
+        # Convert messages to Gemini format
+        history = []
+        system_msg = ""
+        
+        for msg in messages:
+            if msg["role"] == "system":
+                system_msg = msg["content"]
+            elif msg["role"] == "user":
+                history.append({"role": "user", "parts": [msg["content"]]})
+            elif msg["role"] == "assistant":
+                history.append({"role": "model", "parts": [msg["content"]]})
+        
+        chat = client.start_chat(history=history[:-1] if history else [])
+        
+        last_msg = history[-1]["parts"][0] if history else ""
+        if system_msg and json_mode:
+            last_msg = f"{system_msg}\n\nRespond in JSON.\n\n{last_msg}"
+        
+        if not json_mode:
+            return chat.send_message(last_msg).text
+        
+        response = chat.send_message(last_msg, stream=True)
+        return _collect_json_stream(chunk.text for chunk in response)
     
+    @measure
     def _parse_and_validate(self, raw_content: str, max_attempts: int = 2) -> Dict[str, Any]:
         """Parse and validate LLM response."""
-        valid_actions = [
-            "launch_app", "execute_command", "browser_control", "system_control",
-            "file_op", "whatsapp_op", "youtube_op", "task_op", "web_search_op",
-            "web_op", "planner_op", "organize_op", "calendar_op", "gmail_op",
-            "code_op", "memory_op", "reply_op", "teach_skill", "run_skill",
-            "research_op", "converter_op", "error"
-        ]
+        _load_validation()
         
         current_content = raw_content
         
         for attempt in range(max_attempts + 1):
             try:
-                # Clean markdown
-                content = current_content
-                if "```json" in content:
-                    match = re.search(r"```json\s*(\{.*?\})\s*```", content, re.DOTALL)
-                    if match:
-                        content = match.group(1)
-                elif "```" in content:
-                    match = re.search(r"```\s*(\{.*?\})\s*```", content, re.DOTALL)
-                    if match:
-                        content = match.group(1)
-                
-                data = json.loads(content)
-                
-                # Validate with Pydantic
-                adapter = TypeAdapter(TessAction)
-                validated = adapter.validate_python(data)
+                # Parse and validate in one pass inside pydantic-core; json_mode
+                # usually yields raw JSON, so only strip markdown on failure
+                try:
+                    validated = _TESS_ACTION_ADAPTER.validate_json(current_content)
+                except ValidationError:
+                    match = _JSON_FENCE_RE.search(current_content)
+                    if not match:
+                        raise
+                    validated = _TESS_ACTION_ADAPTER.validate_json(match.group(1))
                 
                 return validated.model_dump()
                 
-            except (ValidationError, json.JSONDecodeError) as e:
+            except ValidationError as e:
+                # Malformed JSON is usually fixable locally
+                if any(err["type"] == "json_invalid" for err in e.errors()):
+                    repaired = self._repair_json(current_content)
+                    if repaired is not None:
+                        return repaired
+                
                 if attempt >= max_attempts:
                     return {"action": "error", "reason": f"Validation failed: {e}"}
                 
                 # Ask LLM to correct
                 correction_prompt = f"""Your previous JSON was invalid. Error: {e}
 
-Valid actions are: {', '.join(valid_actions)}
+Valid actions are: {_VALID_ACTIONS_STR}
 
 Output ONLY corrected JSON."""
                 
@@ -402,9 +1192,42 @@ Output ONLY corrected JSON."""
         
         return {"action": "error", "reason": "Max correction attempts exceeded"}
     
+    def _repair_json(self, content: str) -> Optional[Dict[str, Any]]:
+        """
+        Try the local repairs on malformed JSON, starting with the one that
+        last worked for this provider. Returns the validated action or None.
+        """
+        first = self._repair_hints.get(self.current_provider, 0)
+        order = (first, *(i for i in range(len(_JSON_REPAIRS)) if i != first))
+        for i in order:
+            candidate = _JSON_REPAIRS[i](content)
+            if not candidate:
+                continue
+            try:
+                validated = _TESS_ACTION_ADAPTER.validate_json(candidate)
+            except ValidationError:
+                continue
+            self._repair_hints[self.current_provider] = i
+            return validated.model_dump()
+        return None
+    
     def _build_system_prompt(self) -> str:
         """Build the system prompt with configuration."""
-        return f"""You are TESS, an intelligent AI agent.
+        return _render_system_prompt(self.config.security.level, self.config.security.safe_mode)
+    
+    def update_history(self, role: str, content: str):
+        """Add to conversation history."""
+        self.history.append({"role": role, "content": content})
+    
+    def clear_history(self):
+        """Clear conversation history."""
+        self.history.clear()
+
+
+@lru_cache(maxsize=8)
+def _render_system_prompt(level: str, safe_mode: bool) -> str:
+    """Render the system prompt; only the security settings vary, so it is cached."""
+    return f"""You are TESS, an intelligent AI agent.
 
 CORE GOAL: Translate natural language into structured JSON actions.
 
@@ -435,8 +1258,8 @@ VALID ACTIONS:
 - organize_op: {{"path": "...", "criteria": "type|date|size"}}
 - converter_op: {{"sub_action": "images_to_pdf|docx_to_pdf", "source_paths": ["path1", "path2"], "output_filename": "..."}}
 
-SECURITY LEVEL: {self.config.security.level}
-SAFE MODE: {'ON' if self.config.security.safe_mode else 'OFF'}
+SECURITY LEVEL: {level}
+SAFE MODE: {'ON' if safe_mode else 'OFF'}
 
 IMPORTANT:
 - For questions or conversations, use "reply_op"
@@ -446,13 +1269,3 @@ IMPORTANT:
 - For image/PDF conversion, use "converter_op" NOT "execute_command"
 - For missing info, ask rather than guess
 - Flag dangerous operations with is_dangerous: true"""
-    
-    def update_history(self, role: str, content: str):
-        """Add to conversation history."""
-        self.history.append({"role": role, "content": content})
-        if len(self.history) > 20:
-            self.history = self.history[-20:]
-    
-    def clear_history(self):
-        """Clear conversation history."""
-        self.history = []
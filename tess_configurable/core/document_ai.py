@@ -4,8 +4,31 @@ Document AI - PDF, image OCR, and document understanding.
 
 import os
 import io
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Dict, Union
+from typing import Iterator, Optional, List, Dict, Union
+
+# Images are downscaled to this longest side before OCR; text stays legible
+# well below it
+_OCR_MAX_SIDE = 2000
+# LSTM engine only, one uniform text block (skips page layout analysis)
+_OCR_CONFIG = "--oem 1 --psm 6"
+
+
+_mupdf = None
+
+
+def _get_mupdf():
+    """Return the PyMuPDF module if installed, else None."""
+    global _mupdf
+    if _mupdf is None:
+        try:
+            import pymupdf
+            _mupdf = pymupdf
+        except ImportError:
+            _mupdf = False
+    return _mupdf or None
 
 
 class DocumentAI:
@@ -19,28 +42,65 @@ class DocumentAI:
     def __init__(self, brain=None):
         self.brain = brain
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    def iter_pdf_pages(self, pdf_path: str) -> Iterator[str]:
+        """
+        Yield the text of each PDF page in order, parsing lazily so callers
+        can stop early.
+        
+        Uses PyMuPDF when installed (C core, and OCRs image-only pages),
+        then pypdf, then PyPDF2.
+        """
+        mupdf = _get_mupdf()
+        if mupdf is not None:
+            with mupdf.open(pdf_path) as doc:
+                for page in doc:
+                    text = page.get_text("text")
+                    yield text if text.strip() else self._ocr_pdf_page(page)
+            return
+        
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            from PyPDF2 import PdfReader
+        
+        with open(pdf_path, 'rb') as file:
+            for page in PdfReader(file).pages:
+                yield page.extract_text() or ""
+    
+    def _ocr_pdf_page(self, page) -> str:
+        """OCR a scanned PyMuPDF page rendered straight to a grayscale bitmap."""
+        try:
+            import pytesseract
+            from PIL import Image
+            
+            pix = page.get_pixmap(dpi=200, colorspace=_get_mupdf().csGRAY)
+            image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+            return pytesseract.image_to_string(image, config=_OCR_CONFIG)
+        except Exception:
+            # No OCR stack installed, or Tesseract missing: treat page as empty
+            return ""
+    
+    def extract_text_from_pdf(self, pdf_path: str, max_chars: Optional[int] = None) -> str:
         """
         Extract text from PDF file.
         
         Args:
             pdf_path: Path to PDF file
+            max_chars: Stop reading pages once this much text is collected
             
         Returns:
             Extracted text
         """
         try:
-            import PyPDF2
-            
-            text = ""
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"\n--- Page {page_num + 1} ---\n{page_text}"
+            buf = io.StringIO()
+            for page_num, page_text in enumerate(self.iter_pdf_pages(pdf_path)):
+                if page_text:
+                    buf.write(f"\n--- Page {page_num + 1} ---\n")
+                    buf.write(page_text)
+                    if max_chars is not None and buf.tell() >= max_chars:
+                        break
             
+            text = buf.getvalue()
             return text if text else "No text found in PDF"
             
         except ImportError:
@@ -62,11 +122,15 @@ class DocumentAI:
             import pytesseract
             from PIL import Image
             
-            # Open image
+            # Open image; Tesseract's cost scales with pixel count and its LSTM
+            # engine reads a single channel, so shrink and drop color first
             image = Image.open(image_path)
+            if max(image.size) > _OCR_MAX_SIDE:
+                image.thumbnail((_OCR_MAX_SIDE, _OCR_MAX_SIDE), Image.LANCZOS)
+            image = image.convert("L")
             
             # Perform OCR
-            text = pytesseract.image_to_string(image)
+            text = pytesseract.image_to_string(image, config=_OCR_CONFIG)
             
             return text if text.strip() else "No text found in image"
             
@@ -75,6 +139,26 @@ class DocumentAI:
         except Exception as e:
             return f"OCR error: {e}"
     
+    def extract_texts_from_images(self, image_paths: List[str]) -> Dict[str, str]:
+        """
+        OCR several images concurrently.
+        
+        Args:
+            image_paths: Paths to image files
+            
+        Returns:
+            Dictionary of path -> extracted text
+        """
+        if not image_paths:
+            return {}
+        
+        # pytesseract runs one tesseract process per image, so threads
+        # just wait on subprocesses and scale with cores
+        workers = min(os.cpu_count() or 1, len(image_paths))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            texts = pool.map(self.extract_text_from_image, image_paths)
+            return dict(zip(image_paths, texts))
+    
     def extract_text_from_docx(self, docx_path: str) -> str:
         """
         Extract text from Word document.
@@ -117,7 +201,7 @@ class DocumentAI:
         ext = Path(file_path).suffix.lower()
         
         if ext == '.pdf':
-            text = self.extract_text_from_pdf(file_path)
+            text = self.extract_text_from_pdf(file_path, max_chars=10000)
         elif ext in ['.docx', '.doc']:
             text = self.extract_text_from_docx(file_path)
         elif ext in ['.txt', '.md']:
@@ -202,36 +286,47 @@ Summary:"""
         if file_types is None:
             file_types = ['.pdf', '.docx', '.txt', '.md']
         
-        results = {}
         folder = Path(folder_path)
+        candidates = [
+            p for p in folder.iterdir()
+            if p.suffix.lower() in file_types and p.is_file()
+        ]
+        if not candidates:
+            return {}
         
-        for file_path in folder.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in file_types:
+        # Extraction is mostly I/O and C code (file reads, zip/XML parsing),
+        # so threads overlap well; results keep directory order
+        workers = min(32, (os.cpu_count() or 1) * 2, len(candidates))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(p.name, pool.submit(self._extract_one, p, 1000)) for p in candidates]
+            results = {}
+            for name, future in futures:
                 try:
-                    ext = file_path.suffix.lower()
-                    
-                    if ext == '.pdf':
-                        content = self.extract_text_from_pdf(str(file_path))
-                    elif ext == '.docx':
-                        content = self.extract_text_from_docx(str(file_path))
-                    else:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                    
-                    results[file_path.name] = content[:1000]  # Limit storage
-                    
+                    results[name] = future.result()[:1000]  # Limit storage
                 except Exception as e:
-                    results[file_path.name] = f"Error: {e}"
+                    results[name] = f"Error: {e}"
         
         return results
     
-    def search_in_documents(self, folder_path: str, query: str) -> List[Dict]:
+    def _extract_one(self, file_path: Path, max_chars: Optional[int] = None) -> str:
+        """Extract text from one file, dispatching on its extension."""
+        ext = file_path.suffix.lower()
+        
+        if ext == '.pdf':
+            return self.extract_text_from_pdf(str(file_path), max_chars=max_chars)
+        elif ext == '.docx':
+            return self.extract_text_from_docx(str(file_path))
+        else:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                return f.read(max_chars)
+    
+    def search_in_documents(self, folder_path: str, query: Union[str, List[str]]) -> List[Dict]:
         """
         Search for text across multiple documents.
         
         Args:
             folder_path: Folder containing documents
-            query: Search query
+            query: Search query, or a list of queries to match in one pass
             
         Returns:
             List of matches with context
@@ -239,20 +334,36 @@ Summary:"""
         results = []
         documents = self.batch_process(folder_path)
         
-        query_lower = query.lower()
+        if isinstance(query, str):
+            query_lower = query.lower()
+            pattern = None
+        else:
+            # One alternation scans each document once for all queries
+            pattern = re.compile("|".join(map(re.escape, query)), re.IGNORECASE)
         
         for filename, content in documents.items():
-            if query_lower in content.lower():
-                # Find context around match
+            if pattern is None:
                 idx = content.lower().find(query_lower)
-                start = max(0, idx - 100)
-                end = min(len(content), idx + len(query) + 100)
-                context = content[start:end]
-                
-                results.append({
-                    "file": filename,
-                    "context": context,
-                    "position": idx
-                })
+                if idx < 0:
+                    continue
+                match_len = len(query_lower)
+                match = {}
+            else:
+                m = pattern.search(content)
+                if m is None:
+                    continue
+                idx, match_len = m.start(), m.end() - m.start()
+                match = {"match": m.group(0)}
+            
+            # Find context around match
+            start = max(0, idx - 100)
+            end = min(len(content), idx + match_len + 100)
+            
+            results.append({
+                "file": filename,
+                "context": content[start:end],
+                "position": idx,
+                **match
+            })
         
         return results
@@ -4,11 +4,12 @@ Uses Google API with OAuth.
 """
 
 import os
-import pickle
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict
 from pathlib import Path
 
+_GMAIL_BATCH_SIZE = 50
+
 
 class GoogleClient:
     """
@@ -26,20 +27,28 @@ class GoogleClient:
             credentials_path = config.config.google.credentials_file
         
         self.credentials_path = credentials_path
-        self.token_path = str(Path(credentials_path).parent / "token.pickle") if credentials_path else "token.pickle"
+        self.token_path = str(Path(credentials_path).parent / "token.json") if credentials_path else "token.json"
+        # Older versions pickled the credentials
+        self.legacy_token_path = str(Path(self.token_path).with_name("token.pickle"))
     
     def _authenticate(self, service_name: str):
-        """Authenticate with Google API."""
+        """Authenticate with Google API, reusing the service built earlier."""
+        service = self.service_gmail if service_name == "gmail" else self.service_calendar
+        if service is not None and self.creds is not None and self.creds.valid:
+            return service
+        
         try:
             from google.auth.transport.requests import Request
             from google.oauth2.credentials import Credentials
             from google_auth_oauthlib.flow import InstalledAppFlow
             from googleapiclient.discovery import build
             
-            # Load existing token
-            if os.path.exists(self.token_path):
-                with open(self.token_path, 'rb') as token:
-                    self.creds = pickle.load(token)
+            # Load existing token (once; later calls refresh the in-memory creds)
+            if self.creds is None:
+                if os.path.exists(self.token_path):
+                    self.creds = Credentials.from_authorized_user_file(self.token_path)
+                elif os.path.exists(self.legacy_token_path):
+                    self.creds = self._migrate_legacy_token()
             
             # Refresh or create
             if not self.creds or not self.creds.valid:
@@ -58,17 +67,23 @@ class GoogleClient:
                     flow = InstalledAppFlow.from_client_secrets_file(
                         self.credentials_path, scopes)
                     self.creds = flow.run_local_server(port=0)
+                    service = None  # was built around the old credentials
                 
                 # Save token
-                with open(self.token_path, 'wb') as token:
-                    pickle.dump(self.creds, token)
+                self._save_token(self.creds)
+            
+            # The service holds a reference to self.creds, so a refresh above
+            # already applies to it
+            if service is not None:
+                return service
             
-            # Build service
+            # Build service from the discovery documents bundled with the
+            # client library (no discovery fetch or file cache lookup)
             if service_name == "gmail":
-                self.service_gmail = build('gmail', 'v1', credentials=self.creds)
+                self.service_gmail = build('gmail', 'v1', credentials=self.creds, cache_discovery=False)
                 return self.service_gmail
             else:
-                self.service_calendar = build('calendar', 'v3', credentials=self.creds)
+                self.service_calendar = build('calendar', 'v3', credentials=self.creds, cache_discovery=False)
                 return self.service_calendar
                 
         except ImportError:
@@ -79,6 +94,24 @@ class GoogleClient:
             print(f"Auth error: {e}")
             return None
     
+    def _save_token(self, creds):
+        """Write credentials as JSON, readable only by the user."""
+        with open(self.token_path, 'w', encoding='utf-8') as token:
+            token.write(creds.to_json())
+        try:
+            os.chmod(self.token_path, 0o600)
+        except OSError:
+            pass
+    
+    def _migrate_legacy_token(self):
+        """Convert token.pickle from older versions to token.json, once."""
+        import pickle
+        with open(self.legacy_token_path, 'rb') as token:
+            creds = pickle.load(token)
+        self._save_token(creds)
+        os.remove(self.legacy_token_path)
+        return creds
+    
     def list_emails(self, max_results: int = 5) -> str:
         """List recent emails."""
         service = self._authenticate("gmail")
@@ -97,14 +130,40 @@ class GoogleClient:
             if not messages:
                 return "No emails found"
             
+            # Fetch all messages in one multipart batch request, headers only
+            details = {}
+            
+            def collect(request_id, response, exception):
+                if exception is None:
+                    details[request_id] = response
+            
+            # Gmail caps a batch at 100 calls and throttles big ones; 50 is its advice
+            for start in range(0, len(messages), _GMAIL_BATCH_SIZE):
+                batch = service.new_batch_http_request(callback=collect)
+                for i, msg in enumerate(messages[start:start + _GMAIL_BATCH_SIZE], start):
+                    batch.add(
+                        service.users().messages().get(
+                            userId='me', id=msg['id'],
+                            format='metadata', metadataHeaders=['Subject', 'From']
+                        ),
+                        request_id=str(i)
+                    )
+                batch.execute()
+            
             output = ["Recent Emails:", "-" * 40]
             
-            for msg in messages:
-                msg_data = service.users().messages().get(userId='me', id=msg['id']).execute()
+            for i in range(len(messages)):
+                msg_data = details.get(str(i))
+                if msg_data is None:
+                    continue
                 
-                headers = msg_data['payload']['headers']
-                subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-                sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
+                subject, sender = 'No Subject', 'Unknown'
+                for h in msg_data['payload']['headers']:
+                    name = h['name']
+                    if name == 'Subject':
+                        subject = h['value']
+                    elif name == 'From':
+                        sender = h['value']
                 
                 output.append(f"From: {sender}")
                 output.append(f"Subject: {subject}")
@@ -3,14 +3,109 @@ Knowledge Base - Vector database for semantic search.
 Uses ChromaDB for embeddings and search.
 """
 
+import hashlib
+import itertools
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List
+from typing import Iterator, List, Optional, Tuple
+
+# Chunks per ChromaDB upsert in learn_directory
+_UPSERT_BATCH = 256
+# File types learn_directory indexes
+_TEXT_EXTS = frozenset({'.py', '.md', '.txt', '.json', '.js', '.html', '.css', '.java', '.cpp'})
+
+# Suffix that keeps store_memory IDs unique even within one clock tick
+_id_counter = itertools.count()
+
+# onnxruntime execution providers worth preferring over plain CPU
+_ACCELERATED_PROVIDERS = ("CUDAExecutionProvider", "CoreMLExecutionProvider", "DmlExecutionProvider")
+
+
+def _chunk_id(source: str, index: int, chunk: str) -> str:
+    """Stable ID for a chunk: same file, position and text give the same ID across runs."""
+    return hashlib.blake2b(f"{source}\0{index}\0{chunk}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _make_embedding_fn(embedding_functions):
+    """
+    Pick the fastest backend for the all-MiniLM-L6-v2 embeddings.
+    All options produce the same model's vectors, so existing collections stay valid.
+    """
+    try:
+        import onnxruntime
+        available = onnxruntime.get_available_providers()
+        accelerated = [p for p in _ACCELERATED_PROVIDERS if p in available]
+        if accelerated:
+            return embedding_functions.ONNXMiniLM_L6_V2(
+                preferred_providers=accelerated + ["CPUExecutionProvider"]
+            )
+    except Exception:
+        pass
+    
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name="all-MiniLM-L6-v2", device="cuda"
+            )
+    except Exception:
+        pass
+    
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+def _iter_text_files(root: str):
+    """Yield paths of indexable files under root, without building Path objects."""
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in _TEXT_EXTS:
+                    yield entry.path
+
+
+def _read_text(path: str) -> Optional[str]:
+    """Read a text file, or return None (after reporting) if it can't be read."""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    except Exception as e:
+        print(f"Error indexing {path}: {e}")
+        return None
+
+
+def _read_ahead(paths: List[str]) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Yield (path, text) in order, reading on a thread pool. At most two reads
+    per worker are in flight, so a slow consumer doesn't pile file contents
+    up in memory.
+    """
+    workers = min(32, len(paths) or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append((path, pool.submit(_read_text, path)))
+            if len(pending) >= 2 * workers:
+                path, future = pending.popleft()
+                yield path, future.result()
+        while pending:
+            path, future = pending.popleft()
+            yield path, future.result()
 
 
 class KnowledgeBase:
     """
     Manages long-term knowledge using ChromaDB.
+    ChromaDB is only imported on first use, so creating a KnowledgeBase is cheap.
     """
     
     def __init__(self, db_path: Optional[str] = None):
@@ -24,7 +119,14 @@ class KnowledgeBase:
         
         self.client = None
         self.collection = None
-        self._init_chroma()
+        self._chroma_tried = False
+    
+    def _ensure(self) -> bool:
+        """Initialize ChromaDB on first use. Returns True if the collection is ready."""
+        if self.collection is None and not self._chroma_tried:
+            self._chroma_tried = True
+            self._init_chroma()
+        return self.collection is not None
     
     def _init_chroma(self):
         """Initialize ChromaDB."""
@@ -34,8 +136,7 @@ class KnowledgeBase:
             
             self.client = chromadb.PersistentClient(path=str(self.db_path))
             
-            # Use default embedding function
-            self.embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+            self.embedding_fn = _make_embedding_fn(embedding_functions)
             
             self.collection = self.client.get_or_create_collection(
                 name="tess_knowledge",
@@ -57,40 +158,70 @@ class KnowledgeBase:
         Returns:
             Status message
         """
-        if not self.collection:
+        if not self._ensure():
             return "Knowledge base not initialized"
         
         source = Path(path)
         if not source.exists():
             return f"Path not found: {path}"
         
-        text_extensions = {'.py', '.md', '.txt', '.json', '.js', '.html', '.css', '.java', '.cpp'}
         count = 0
         
-        for file_path in source.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in text_extensions:
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    if not content.strip():
-                        continue
-                    
-                    # Chunk content
-                    chunks = [content[i:i+1000] for i in range(0, len(content), 1000)]
-                    
-                    ids = [f"{file_path}_{i}" for i in range(len(chunks))]
-                    metadatas = [{"source": str(file_path), "chunk": i} for i in range(len(chunks))]
-                    
+        # Chunks from many files go into one upsert: one embedding pass and
+        # one SQLite transaction per batch instead of per file
+        docs: List[str] = []
+        ids: List[str] = []
+        metadatas: List[dict] = []
+        batch_files: set = set()
+        
+        def flush():
+            nonlocal count
+            if not docs:
+                return
+            try:
+                # IDs hash the chunk content, so chunks already stored are unchanged
+                # and need no new embedding
+                existing = set(self.collection.get(ids=ids, include=[])["ids"])
+                new = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing]
+                
+                # Drop chunks left over from earlier versions of these files. Checked
+                # even when nothing is new: a truncated file only loses its tail.
+                old = self.collection.get(where={"source": {"$in": list(batch_files)}}, include=[])["ids"]
+                stale = set(old).difference(ids)
+                if stale:
+                    self.collection.delete(ids=list(stale))
+                
+                if new:
                     self.collection.upsert(
-                        documents=chunks,
-                        ids=ids,
-                        metadatas=metadatas
+                        documents=[docs[i] for i in new],
+                        ids=[ids[i] for i in new],
+                        metadatas=[metadatas[i] for i in new]
                     )
-                    count += 1
-                    
-                except Exception as e:
-                    print(f"Error indexing {file_path}: {e}")
+                count += len(batch_files)
+            except Exception as e:
+                print(f"Error indexing batch of {len(batch_files)} files: {e}")
+            docs.clear()
+            ids.clear()
+            metadatas.clear()
+            batch_files.clear()
+        
+        for file_path, content in _read_ahead(list(_iter_text_files(str(source)))):
+            if not content or content.isspace():
+                continue
+            
+            # Chunk content
+            for i in range(0, len(content), 1000):
+                n = i // 1000
+                chunk = content[i:i+1000]
+                docs.append(chunk)
+                ids.append(_chunk_id(file_path, n, chunk))
+                metadatas.append({"source": file_path, "chunk": n})
+            batch_files.add(file_path)
+            
+            if len(docs) >= _UPSERT_BATCH:
+                flush()
+        
+        flush()
         
         return f"Indexed {count} files from {path}"
     
@@ -105,7 +236,7 @@ class KnowledgeBase:
         Returns:
             Formatted search results
         """
-        if not self.collection:
+        if not self._ensure():
             return "Knowledge base not initialized"
         
         try:
@@ -129,12 +260,11 @@ class KnowledgeBase:
     
     def store_memory(self, text: str, metadata: Optional[dict] = None) -> bool:
         """Store a memory/document."""
-        if not self.collection:
+        if not self._ensure():
             return False
         
         try:
-            import time
-            doc_id = f"mem_{int(time.time()*1000)}"
+            doc_id = f"mem_{time.time_ns()}_{next(_id_counter)}"
             
             self.collection.add(
                 documents=[text],
@@ -148,7 +278,7 @@ class KnowledgeBase:
     
     def get_stats(self) -> str:
         """Get knowledge base statistics."""
-        if not self.collection:
+        if not self._ensure():
             return "Knowledge base not initialized"
         
         try:
@@ -2,18 +2,72 @@
 Memory Engine for TESS - Persistent memory storage.
 """
 
+import atexit
+import heapq
+import itertools
 import json
+import math
 import os
+import re
+import threading
 import time
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Seconds between background write-backs of pending changes
+_FLUSH_INTERVAL = 1.0
+# Rewrite the log once more than this share of its lines are tombstones
+_COMPACT_RATIO = 0.25
+# BM25 term-frequency saturation and length normalisation
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+_TOKEN_RE = re.compile(r"\w+")
+
+# Suffix that keeps memory IDs unique even within one clock tick
+_id_counter = itertools.count()
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # non-str keys, ints over 64 bits, ...; json accepts them
+    return json.dumps(obj).encode('utf-8')
+
+
+def _loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
 
 class MemoryEngine:
     """
     Lightweight persistent memory system.
-    Stores memories as JSON for easy retrieval.
+    Stores memories as an append-only JSONL log: one line per stored
+    memory and a tombstone line per deleted one. The log is compacted
+    when tombstones pile up. Retrieval ranks memories with BM25 over an
+    in-memory inverted index rebuilt from the log on load.
+
+    Changes are written back by a background thread (and on exit), so
+    store/forget/clear never wait on disk. Call flush() to force a write.
     """
     
     def __init__(self, user_id: str = "default", memory_dir: Optional[str] = None):
@@ -27,27 +81,166 @@ class MemoryEngine:
         self.memory_dir = Path(memory_dir)
         self.memory_dir.mkdir(parents=True, exist_ok=True)
         
-        self.memory_file = self.memory_dir / f"{user_id}_memory.json"
+        self.memory_file = self.memory_dir / f"{user_id}_memory.jsonl"
         self.memories: List[Dict] = []
+        # Inverted index. Each memory gets a stable slot number; _slots is
+        # parallel to self.memories.
+        self._slots: List[int] = []
+        self._docs: Dict[int, Tuple[Dict, Counter, int]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._total_len = 0
+        self._next_slot = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._pending: List[Dict] = []  # log lines not yet appended
+        self._log_lines = 0
+        self._tombstones = 0
+        self._rewrite = False
         self._load()
+
+        threading.Thread(target=self._flusher, daemon=True).start()
+        atexit.register(self.flush)
     
     def _load(self):
-        """Load memories from file."""
-        if self.memory_file.exists():
-            try:
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    self.memories = json.load(f)
-            except Exception as e:
-                print(f"Error loading memory: {e}")
-                self.memories = []
-    
-    def _save(self):
-        """Save memories to file."""
+        """Load memories by replaying the log."""
+        if not self.memory_file.exists():
+            self._migrate_legacy()
+            return
+        skipped = 0
         try:
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump(self.memories, f, indent=2)
+            with open(self.memory_file, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = _loads(line)
+                    except ValueError:
+                        record = None
+                    if not isinstance(record, dict) or "id" not in record:
+                        # e.g. a line torn by a crash mid-append; keep the rest
+                        skipped += 1
+                        continue
+                    self._log_lines += 1
+                    if record.get("deleted"):
+                        self._tombstones += 1
+                        self._drop(record["id"])
+                    else:
+                        self._index(record)
         except Exception as e:
-            print(f"Error saving memory: {e}")
+            print(f"Error loading memory: {e}")
+            self._reset_index()
+            return
+        if skipped:
+            print(f"Skipped {skipped} unreadable line(s) in {self.memory_file.name}")
+            # Compact on the next save so the bad lines are dropped
+            self._rewrite = True
+            self._dirty = True
+
+    def _migrate_legacy(self):
+        """Import memories from the old whole-file JSON format."""
+        legacy = self.memory_file.with_suffix(".json")
+        if not legacy.exists():
+            return
+        try:
+            with open(legacy, 'rb') as f:
+                if ijson is not None:
+                    # Stream the array instead of holding file and objects at once
+                    for mem in ijson.items(f, 'item', use_float=True):
+                        self._index(mem)
+                else:
+                    for mem in _loads(f.read()):
+                        self._index(mem)
+        except Exception as e:
+            print(f"Error loading memory: {e}")
+            self._reset_index()
+            return
+        self._rewrite = True
+        self._dirty = True
+
+    def _index(self, mem: Dict):
+        """Add a memory to the list and the inverted index."""
+        slot = self._next_slot
+        self._next_slot += 1
+        tf = Counter(_tokens(mem["text"]))
+        length = sum(tf.values())
+        for term in tf:
+            self._postings.setdefault(term, set()).add(slot)
+        self._docs[slot] = (mem, tf, length)
+        self._total_len += length
+        self.memories.append(mem)
+        self._slots.append(slot)
+
+    def _reset_index(self):
+        self.memories = []
+        self._slots = []
+        self._docs = {}
+        self._postings = {}
+        self._total_len = 0
+
+    def _drop(self, memory_id: str) -> bool:
+        """Remove the first memory with memory_id from the list and index."""
+        for i, mem in enumerate(self.memories):
+            if mem["id"] == memory_id:
+                del self.memories[i]
+                slot = self._slots.pop(i)
+                _, tf, length = self._docs.pop(slot)
+                for term in tf:
+                    postings = self._postings[term]
+                    postings.discard(slot)
+                    if not postings:
+                        del self._postings[term]
+                self._total_len -= length
+                return True
+        return False
+
+    def _save(self):
+        """Append pending log lines, or compact the log when due."""
+        with self._write_lock:
+            with self._lock:
+                self._dirty = False
+                pending, self._pending = self._pending, []
+                lines = self._log_lines + len(pending)
+                tombstones = self._tombstones + sum(1 for r in pending if r.get("deleted"))
+                rewrite = self._rewrite or tombstones > lines * _COMPACT_RATIO
+                records = list(self.memories) if rewrite else pending
+                self._rewrite = False
+            try:
+                data = b"".join(_dumps(r) + b"\n" for r in records)
+                if rewrite:
+                    tmp = self.memory_file.with_suffix(".tmp")
+                    with open(tmp, 'wb') as f:
+                        f.write(data)
+                    os.replace(tmp, self.memory_file)
+                    lines, tombstones = len(records), 0
+                else:
+                    with open(self.memory_file, 'ab') as f:
+                        f.write(data)
+                self._log_lines, self._tombstones = lines, tombstones
+            except Exception as e:
+                print(f"Error saving memory: {e}")
+                with self._lock:
+                    if rewrite:
+                        self._rewrite = True
+                    else:
+                        self._pending[:0] = pending
+                    self._dirty = True
+
+    def _flusher(self):
+        """Write pending changes back in the background."""
+        while True:
+            time.sleep(_FLUSH_INTERVAL)
+            if self._dirty:
+                try:
+                    self._save()
+                except Exception as e:
+                    # Keep the thread alive; the next pass retries
+                    print(f"Error saving memory: {e}")
+
+    def flush(self):
+        """Write pending changes to disk now."""
+        if self._dirty:
+            self._save()
     
     def store(self, text: str, metadata: Optional[Dict] = None) -> str:
         """
@@ -60,20 +253,23 @@ class MemoryEngine:
         Returns:
             Memory ID
         """
+        now_ns = time.time_ns()
         entry = {
-            "id": str(int(time.time() * 1000)),
-            "timestamp": datetime.now().isoformat(),
+            "id": f"{now_ns}_{next(_id_counter)}",
+            "timestamp": datetime.fromtimestamp(now_ns / 1e9).isoformat(),
             "text": text,
             "metadata": metadata or {}
         }
         
-        self.memories.append(entry)
-        self._save()
+        with self._lock:
+            self._index(entry)
+            self._pending.append(entry)
+            self._dirty = True
         return entry["id"]
     
     def retrieve(self, query: str, limit: int = 3) -> List[str]:
         """
-        Retrieve relevant memories based on keyword matching.
+        Retrieve relevant memories ranked by BM25 keyword relevance.
         
         Args:
             query: Search query
@@ -82,22 +278,33 @@ class MemoryEngine:
         Returns:
             List of memory texts
         """
-        query_words = set(query.lower().split())
-        scored = []
+        terms = set(_tokens(query))
+        if not terms or limit <= 0:
+            return []
         
-        for mem in self.memories:
-            mem_words = set(mem["text"].lower().split())
-            intersection = query_words.intersection(mem_words)
+        with self._lock:
+            n = len(self._docs)
+            if not n:
+                return []
+            avg_len = self._total_len / n or 1.0
+            scores: Dict[int, float] = {}
             
-            if intersection:
-                # Simple Jaccard similarity
-                score = len(intersection) / len(query_words.union(mem_words))
-                scored.append((score, mem))
-        
-        # Sort by score
-        scored.sort(key=lambda x: x[0], reverse=True)
-        
-        return [m[1]["text"] for m in scored[:limit]]
+            # Only memories sharing a term with the query are scored
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for slot in postings:
+                    _, tf, length = self._docs[slot]
+                    f = tf[term]
+                    norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * length / avg_len)
+                    scores[slot] = scores.get(slot, 0.0) + idf * f * (_BM25_K1 + 1) / (f + norm)
+            
+            # Ties go to the older memory
+            top = heapq.nlargest(limit, scores.items(), key=lambda kv: (kv[1], -kv[0]))
+            return [self._docs[slot][0]["text"] for slot, _ in top]
     
     def get_context_string(self, query: str, limit: int = 3) -> str:
         """Get formatted context string for prompt injection."""
@@ -121,14 +328,17 @@ class MemoryEngine:
     
     def forget(self, memory_id: str) -> bool:
         """Delete a memory by ID."""
-        for i, mem in enumerate(self.memories):
-            if mem["id"] == memory_id:
-                del self.memories[i]
-                self._save()
-                return True
-        return False
+        with self._lock:
+            if not self._drop(memory_id):
+                return False
+            self._pending.append({"id": memory_id, "deleted": True})
+            self._dirty = True
+        return True
     
     def clear(self):
         """Clear all memories."""
-        self.memories = []
-        self._save()
+        with self._lock:
+            self._reset_index()
+            self._pending = []
+            self._rewrite = True
+            self._dirty = True
@@ -3,10 +3,51 @@ Notion Integration - Knowledge management and note-taking.
 """
 
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Upper bound on concurrent requests for the *_many helpers
+_MAX_PARALLEL = 8
+# Seconds a formatted search result is reused, and how many are kept
+_SEARCH_CACHE_TTL = 30.0
+_SEARCH_CACHE_SIZE = 64
+
+_session = None
+
+
+def _loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _get_session():
+    """Shared keep-alive session so Notion calls reuse TLS connections."""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # Retry's default allowed_methods skips POST/PATCH, so page
+        # creation is never silently repeated
+        retry = Retry(total=3, backoff_factor=0.2,
+                      status_forcelist=[429, 500, 502, 503, 504])
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20,
+                                              max_retries=retry))
+        _session = session
+    return _session
+
 
 class NotionClient:
     """
@@ -23,6 +64,8 @@ class NotionClient:
         self.api_token = api_token
         self.base_url = "https://api.notion.com/v1"
         self.headers = {}
+        # (query, filter_type) -> (time stored, formatted results)
+        self._search_cache: Dict[Tuple[str, Optional[str]], Tuple[float, str]] = {}
         
         if api_token:
             self._setup_headers()
@@ -60,21 +103,19 @@ class NotionClient:
             return {"error": "Notion API token not configured"}
         
         try:
-            import requests
+            session = _get_session()
             
             url = f"{self.base_url}/{endpoint}"
             
             if method == "GET":
-                response = requests.get(url, headers=self.headers)
-            elif method == "POST":
-                response = requests.post(url, headers=self.headers, json=data)
-            elif method == "PATCH":
-                response = requests.patch(url, headers=self.headers, json=data)
+                response = session.get(url, headers=self.headers)
+            elif method in ("POST", "PATCH"):
+                response = session.request(method, url, headers=self.headers, json=data)
             else:
                 return {"error": f"Unsupported method: {method}"}
             
             if response.status_code in [200, 201]:
-                return response.json()
+                return _loads(response.content)
             else:
                 return {"error": f"API Error {response.status_code}: {response.text}"}
                 
@@ -94,6 +135,11 @@ class NotionClient:
         Returns:
             Formatted search results
         """
+        key = (query, filter_type)
+        cached = self._search_cache.get(key)
+        if cached and time.monotonic() - cached[0] < _SEARCH_CACHE_TTL:
+            return cached[1]
+        
         data = {"query": query}
         
         if filter_type:
@@ -124,7 +170,23 @@ class NotionClient:
                 title = self._extract_title(item)
                 output.append(f"🗃️  {title} (Database)")
         
-        return "\n".join(output)
+        text = "\n".join(output)
+        if len(self._search_cache) >= _SEARCH_CACHE_SIZE:
+            self._search_cache.pop(next(iter(self._search_cache)), None)
+        self._search_cache[key] = (time.monotonic(), text)
+        return text
+    
+    def search_many(self, queries: List[str], filter_type: str = None) -> List[str]:
+        """
+        Run several searches concurrently.
+        
+        Returns:
+            Formatted results, in the same order as queries
+        """
+        if not queries:
+            return []
+        with ThreadPoolExecutor(max_workers=min(_MAX_PARALLEL, len(queries))) as pool:
+            return list(pool.map(lambda q: self.search(q, filter_type), queries))
     
     def _extract_title(self, item: Dict) -> str:
         """Extract title from Notion item."""
@@ -186,6 +248,8 @@ class NotionClient:
         if "error" in result:
             return f"Error creating page: {result['error']}"
         
+        # New pages must show up in the next search
+        self._search_cache.clear()
         url = result.get("url", "")
         return f"Created page: {title}\nURL: {url}"
     
@@ -289,6 +353,7 @@ class NotionClient:
         if "error" in result:
             return f"Error appending content: {result['error']}"
         
+        self._search_cache.clear()
         return "Content added successfully"
     
     def get_setup_instructions(self) -> str:
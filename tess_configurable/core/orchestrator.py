@@ -3,40 +3,352 @@ Orchestrator for TESS Configurable Edition.
 Routes actions to appropriate handlers.
 """
 
+import atexit
+import itertools
+import locale
+import mmap
 import os
+import queue
+import selectors
+import shlex
 import subprocess
 import platform
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, Callable, Optional
+from typing import Dict, Any, Callable, List, Optional
 
-# Lazy imports for optional features
-DocumentAI = None
-WorkflowEngine = None
-PreferenceMemory = None
+from ._lazy import cached_import, lazy_import
 
+# Feature modules, imported on first use
+document_ai = lazy_import(".document_ai", __package__)
+workflow_engine = lazy_import(".workflow_engine", __package__)
+preference_memory = lazy_import(".preference_memory", __package__)
+playwright_browser = lazy_import(".playwright_browser", __package__)
+google_client = lazy_import(".google_client", __package__)
+notion_client = lazy_import(".notion_client", __package__)
+planner = lazy_import(".planner", __package__)
+whatsapp_client = lazy_import(".whatsapp_client", __package__)
+youtube_client = lazy_import(".youtube_client", __package__)
+task_registry = lazy_import(".task_registry", __package__)
+web_browser = lazy_import(".web_browser", __package__)
 
-def _get_document_ai(brain=None):
-    global DocumentAI
-    if DocumentAI is None:
-        from .document_ai import DocumentAI as DA
-        DocumentAI = DA
-    return DocumentAI(brain)
+# Optional screenshot backends; mss grabs the screen without going through PIL
+mss = lazy_import("mss")
+ImageGrab = lazy_import("PIL.ImageGrab")
 
+_memory_engine = None
 
-def _get_workflow_engine(brain=None, orchestrator=None):
-    global WorkflowEngine
-    if WorkflowEngine is None:
-        from .workflow_engine import WorkflowEngine as WE
-        WorkflowEngine = WE
-    return WorkflowEngine(brain, orchestrator)
+# Seconds before a shell command is killed
+_COMMAND_TIMEOUT = 30
+# Printed after each command sent to the shared PowerShell session
+_PS_SENTINEL = "<<<TESS_END>>>"
 
+_SYSTEM = platform.system()
+IS_WINDOWS = _SYSTEM == "Windows"
+_HOME = os.path.expanduser("~")
 
-def _get_preference_memory(user_id="default"):
-    global PreferenceMemory
-    if PreferenceMemory is None:
-        from .preference_memory import PreferenceMemory as PM
-        PreferenceMemory = PM
-    return PreferenceMemory(user_id)
+# Anything the shell would expand or interpret; such commands still go through /bin/sh
+_SHELL_SYNTAX_RE = re.compile(r"[;|&<>$`*?\[\]{}()~#!\\\n]")
+
+# Substrings that mark a command as dangerous, matched case-insensitively in one pass
+_DANGEROUS_PATTERNS = (
+    "rm -rf", "del /s", "format", "rd /s", "rmdir /s",
+    "shutdown", "taskkill", "reg delete",
+    "mkfs", "dd if=", ":(){",
+)
+_DANGEROUS_RE = re.compile("|".join(map(re.escape, _DANGEROUS_PATTERNS)), re.IGNORECASE)
+
+# App name -> launch command, per platform
+_APP_MAP_WIN = {
+    "chrome": "chrome",
+    "firefox": "firefox",
+    "edge": "msedge",
+    "notepad": "notepad",
+    "calculator": "calc",
+    "explorer": "explorer",
+    "cmd": "cmd",
+    "powershell": "powershell",
+    "code": "code",
+    "spotify": "spotify",
+}
+_APP_MAP_MAC = {
+    "chrome": "open -a 'Google Chrome'",
+    "firefox": "open -a Firefox",
+    "safari": "open -a Safari",
+    "terminal": "open -a Terminal",
+}
+_APP_MAP_LINUX = {
+    "chrome": "google-chrome",
+    "firefox": "firefox",
+    "terminal": "gnome-terminal",
+}
+_APP_MAP = {"Darwin": _APP_MAP_MAC, "Linux": _APP_MAP_LINUX}.get(_SYSTEM, _APP_MAP_WIN)
+# Launch command -> argv, so POSIX launches skip the /bin/sh wrapper
+_APP_ARGV = {} if IS_WINDOWS else {cmd: shlex.split(cmd) for cmd in _APP_MAP.values()}
+
+_reaper = None
+# Set when a reaper thread dies; later commands use the thread-pool path
+_reaper_failed = False
+_wait_pool = None
+_reaper_lock = threading.Lock()
+
+
+def _get_memory_engine():
+    # Shared so pending (not yet flushed) memories are never lost to a
+    # second instance loading a stale file.
+    global _memory_engine
+    if _memory_engine is None:
+        MemoryEngine = cached_import(".memory_engine", "MemoryEngine")
+        _memory_engine = MemoryEngine()
+    return _memory_engine
+
+
+def _start_command(command: str, **kwargs) -> subprocess.Popen:
+    """
+    Start command with piped stdout/stderr. On POSIX, plain commands are
+    split and run directly so CPython can posix_spawn them without a shell.
+    """
+    pipes = dict(stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+    if IS_WINDOWS:
+        return subprocess.Popen(["powershell", "-Command", command], **pipes)
+    
+    if not _SHELL_SYNTAX_RE.search(command):
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            argv = None
+        # NAME=value prefixes are shell assignments
+        if argv and "=" not in argv[0]:
+            try:
+                return subprocess.Popen(argv, **pipes)
+            except OSError:
+                pass  # not a program on PATH (e.g. cd); let the shell handle it
+    return subprocess.Popen(command, shell=True, **pipes)
+
+
+def _expand_home(path: str) -> str:
+    """Expand a leading ~ or ~/ using the home directory resolved at import."""
+    if path == "~" or path.startswith(("~/", "~" + os.sep)):
+        return _HOME + path[1:]
+    if path.startswith("~"):
+        return os.path.expanduser(path)  # ~user
+    return path
+
+
+def _command_result(returncode: int, stdout, stderr) -> str:
+    """Format a finished command's output the way execute_command reports it."""
+    output = stdout if returncode == 0 else stderr
+    if isinstance(output, bytes):
+        output = output.decode(locale.getpreferredencoding(False), errors="replace")
+    return output or "Command executed successfully (no output)"
+
+
+def _communicate(proc: subprocess.Popen, timeout: float) -> str:
+    """Wait for proc on the calling thread (used where pidfds are unavailable)."""
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        return f"Command timed out after {timeout} seconds"
+    return _command_result(proc.returncode, stdout, stderr)
+
+
+class _Job:
+    __slots__ = ("proc", "future", "deadline", "pidfd", "open", "chunks")
+    
+    def __init__(self, proc, future, deadline, pidfd):
+        self.proc = proc
+        self.future = future
+        self.deadline = deadline
+        self.pidfd = pidfd
+        self.open = 3  # stdout, stderr and the pidfd
+        self.chunks = {"out": [], "err": []}
+
+
+class _ProcessReaper:
+    """
+    Waits on running commands from one background thread. Each child is
+    watched through a pidfd next to its stdout/stderr pipes, so a single
+    select() harvests output and exits for every command in flight.
+    """
+    
+    def __init__(self):
+        self._sel = selectors.DefaultSelector()
+        self._incoming: "queue.SimpleQueue[_Job]" = queue.SimpleQueue()
+        self._jobs: List[_Job] = []
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+        self._dead = False
+        self._submit_lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True).start()
+    
+    def submit(self, proc: subprocess.Popen, timeout: float) -> Future:
+        """Track proc (started with binary stdout/stderr pipes) until it exits."""
+        future = Future()
+        # Checked and queued under the lock, so _fail either sees the job
+        # when it drains _incoming or this raises and execute() falls back
+        with self._submit_lock:
+            if self._dead:
+                raise OSError("command reaper has stopped")
+            pidfd = os.pidfd_open(proc.pid)
+            self._incoming.put(_Job(proc, future, time.monotonic() + timeout, pidfd))
+        os.write(self._wake_w, b"\0")
+        return future
+    
+    def _run(self):
+        try:
+            while True:
+                self._step()
+        except Exception as e:
+            self._fail(e)
+    
+    def _step(self):
+        """One select() round: collect output, finish exited jobs, enforce timeouts."""
+        timeout = None
+        if self._jobs:
+            timeout = max(0.0, min(job.deadline for job in self._jobs) - time.monotonic())
+        for key, _ in self._sel.select(timeout):
+            if key.data is None:
+                self._accept()
+                continue
+            job, kind = key.data
+            if kind != "exit":
+                chunk = os.read(key.fd, 65536)
+                if chunk:
+                    job.chunks[kind].append(chunk)
+                    continue
+            self._sel.unregister(key.fd)
+            job.open -= 1
+            if job.open == 0:
+                self._finish(job)
+        
+        now = time.monotonic()
+        for job in [job for job in self._jobs if job.deadline <= now]:
+            job.proc.kill()
+            self._finish(job, f"Command timed out after {_COMMAND_TIMEOUT} seconds")
+    
+    def _fail(self, error: Exception):
+        """Fail every job in flight and retire this reaper so execute() falls back."""
+        global _reaper, _reaper_failed
+        print(f"[ERROR] Command reaper stopped: {error}")
+        with self._submit_lock:
+            self._dead = True
+        with _reaper_lock:
+            _reaper_failed = True
+            if _reaper is self:
+                _reaper = None
+        while True:
+            try:
+                self._jobs.append(self._incoming.get_nowait())
+            except queue.Empty:
+                break
+        for job in self._jobs:
+            try:
+                job.proc.kill()
+            except OSError:
+                pass
+            if not job.future.done():
+                job.future.set_exception(error)
+        self._jobs.clear()
+    
+    def _accept(self):
+        try:
+            os.read(self._wake_r, 4096)
+        except BlockingIOError:
+            pass
+        while True:
+            try:
+                job = self._incoming.get_nowait()
+            except queue.Empty:
+                return
+            self._jobs.append(job)
+            self._sel.register(job.proc.stdout, selectors.EVENT_READ, (job, "out"))
+            self._sel.register(job.proc.stderr, selectors.EVENT_READ, (job, "err"))
+            self._sel.register(job.pidfd, selectors.EVENT_READ, (job, "exit"))
+    
+    def _finish(self, job: _Job, result: Optional[str] = None):
+        for fileobj in (job.proc.stdout, job.proc.stderr, job.pidfd):
+            try:
+                self._sel.unregister(fileobj)
+            except KeyError:
+                pass
+        os.close(job.pidfd)
+        job.proc.stdout.close()
+        job.proc.stderr.close()
+        job.proc.wait()
+        self._jobs.remove(job)
+        if result is None:
+            result = _command_result(job.proc.returncode,
+                                     b"".join(job.chunks["out"]), b"".join(job.chunks["err"]))
+        job.future.set_result(result)
+
+
+def _wait_result(future: Future) -> str:
+    """Output of a command Future, with a backstop in case its waiter died."""
+    try:
+        return future.result(timeout=_COMMAND_TIMEOUT + 5)
+    except FutureTimeout:
+        return f"Command timed out after {_COMMAND_TIMEOUT} seconds"
+    except Exception as e:
+        return f"Error: {e}"
+
+
+def _get_reaper() -> Optional[_ProcessReaper]:
+    """Shared reaper, or None on platforms without pidfd_open (Linux only)."""
+    global _reaper
+    if _reaper is None and not _reaper_failed and hasattr(os, "pidfd_open"):
+        with _reaper_lock:
+            if _reaper is None:
+                _reaper = _ProcessReaper()
+    return _reaper
+
+
+def _get_wait_pool() -> ThreadPoolExecutor:
+    global _wait_pool
+    if _wait_pool is None:
+        with _reaper_lock:
+            if _wait_pool is None:
+                _wait_pool = ThreadPoolExecutor(max_workers=4)
+    return _wait_pool
+
+
+class _BufferedOutput:
+    """
+    Collects a handler's output lines and writes them with one callback or
+    print per flush. Call flush_now() before slow or interactive work so
+    status lines show up first.
+    """
+
+    def __init__(self, callback=None):
+        self._callback = callback
+        self._lines: List[str] = []
+
+    def __call__(self, text: str):
+        self._lines.append(text)
+
+    def flush_now(self):
+        if not self._lines:
+            return
+        text = "\n".join(self._lines)
+        self._lines.clear()
+        if self._callback:
+            self._callback(text)
+        else:
+            print(text)
+
+
+@dataclass
+class PendingCommand:
+    """A shell command checked against the security policy but not started yet."""
+    command: str
+    needs_confirm: bool = False
+    blocked: bool = False
 
 
 class Executor:
@@ -44,76 +356,160 @@ class Executor:
     
     def __init__(self, safe_mode: bool = True):
         self.safe_mode = safe_mode
+    
+    def plan(self, command: str, confirm_dangerous: bool = True) -> PendingCommand:
+        """Decide whether command needs confirmation, without running it."""
+        return PendingCommand(command, needs_confirm=self.safe_mode and confirm_dangerous)
         
     def execute_command(self, command: str, confirm_dangerous: bool = True) -> str:
         """Execute a shell command with optional confirmation."""
-        if self.safe_mode and confirm_dangerous:
+        return _wait_result(self.execute_command_async(command, confirm_dangerous))
+    
+    def execute_command_async(self, command: str, confirm_dangerous: bool = True) -> Future:
+        """
+        Start a shell command and return a Future for its output, so several
+        commands can run at once. Confirmation still happens before returning.
+        """
+        pending = self.plan(command, confirm_dangerous)
+        if pending.needs_confirm:
             response = input(f"Execute: {command}? [y/N]: ")
             if response.lower() != 'y':
-                return "Command cancelled by user"
+                future = Future()
+                future.set_result("Command cancelled by user")
+                return future
+        return self.execute(pending)
+    
+    def execute_batch(self, pending: List[PendingCommand]) -> List[Future]:
+        """Start already-approved commands together; they run concurrently."""
+        return [self.execute(p) for p in pending]
+    
+    def execute(self, pending: PendingCommand) -> Future:
+        """
+        Start an approved command and return a Future for its output.
+        No confirmation is asked here; callers confirm from the plan first.
+        """
+        future = Future()
+        if pending.blocked:
+            future.set_result("Command blocked by HIGH security level")
+            return future
         
         try:
-            if platform.system() == "Windows":
-                result = subprocess.run(
-                    ["powershell", "-Command", command],
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-            else:
-                result = subprocess.run(
-                    command,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
+            reaper = _get_reaper()
+            if reaper is not None:
+                proc = _start_command(pending.command)
+                try:
+                    return reaper.submit(proc, _COMMAND_TIMEOUT)
+                except OSError:
+                    # Kernel without pidfd support (< 5.3)
+                    return _get_wait_pool().submit(_communicate, proc, _COMMAND_TIMEOUT)
             
-            output = result.stdout if result.returncode == 0 else result.stderr
-            return output or "Command executed successfully (no output)"
-        except subprocess.TimeoutExpired:
-            return "Command timed out after 30 seconds"
+            proc = _start_command(pending.command, text=True)
+            return _get_wait_pool().submit(_communicate, proc, _COMMAND_TIMEOUT)
         except Exception as e:
-            return f"Error: {e}"
+            future.set_result(f"Error: {e}")
+            return future
 
 
 class SystemController:
     """Controls system functions."""
     
+    # Virtual-key codes sent through WScript.Shell.SendKeys
+    VOLUME_KEYS = {"up": 175, "down": 174, "mute": 173}
+    MEDIA_KEYS = {
+        "play": 179,
+        "pause": 179,
+        "playpause": 179,
+        "next": 176,
+        "prev": 177,
+        "stop": 178
+    }
+    
+    def __init__(self):
+        self._pending_keys: List[int] = []
+        self._ps_proc: Optional[subprocess.Popen] = None
+        self._ps_lines: Optional[queue.Queue] = None
+        self._ps_lock = threading.Lock()
+    
+    @staticmethod
+    def _pump_lines(stream, lines: queue.Queue):
+        """Copy stream's lines into a queue; None marks end of output."""
+        for line in stream:
+            lines.put(line)
+        lines.put(None)
+    
+    def _powershell(self, script: str) -> str:
+        """
+        Run a one-line script in a long-lived PowerShell session and return
+        its output, so only the first call pays PowerShell's startup cost.
+        """
+        with self._ps_lock:
+            if self._ps_proc is None or self._ps_proc.poll() is not None:
+                self._ps_proc = subprocess.Popen(
+                    ["powershell", "-NoLogo", "-NoProfile", "-Command", "-"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True
+                )
+                atexit.register(self._ps_proc.kill)
+                self._ps_lines = queue.Queue()
+                threading.Thread(
+                    target=self._pump_lines,
+                    args=(self._ps_proc.stdout, self._ps_lines),
+                    daemon=True
+                ).start()
+            proc = self._ps_proc
+            # Sentinel on its own line, so it still prints if the script fails
+            proc.stdin.write(f"{script}\nWrite-Output '{_PS_SENTINEL}'\n")
+            proc.stdin.flush()
+            
+            lines = []
+            deadline = time.monotonic() + _COMMAND_TIMEOUT
+            while True:
+                try:
+                    line = self._ps_lines.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    line = None
+                if line is None:
+                    # Hung (e.g. waiting on an unclosed brace) or exited; start over next time
+                    proc.kill()
+                    self._ps_proc = None
+                    raise TimeoutError("PowerShell did not finish the script")
+                if line.rstrip() == _PS_SENTINEL:
+                    break
+                lines.append(line)
+            return "".join(lines)
+    
     def set_volume(self, direction: str):
-        """Adjust system volume."""
-        if platform.system() == "Windows":
-            if direction == "up":
-                os.system("powershell -c $wsh=New-Object -ComObject WScript.Shell; $wsh.SendKeys([char]175)")
-            elif direction == "down":
-                os.system("powershell -c $wsh=New-Object -ComObject WScript.Shell; $wsh.SendKeys([char]174)")
-            elif direction == "mute":
-                os.system("powershell -c $wsh=New-Object -ComObject WScript.Shell; $wsh.SendKeys([char]173)")
+        """Queue a volume key. Sent by flush_keys()."""
+        if IS_WINDOWS and direction in self.VOLUME_KEYS:
+            self._pending_keys.append(self.VOLUME_KEYS[direction])
     
     def media_control(self, action: str):
-        """Control media playback."""
-        if platform.system() == "Windows":
-            key_map = {
-                "play": "[char]179",
-                "pause": "[char]179",
-                "playpause": "[char]179",
-                "next": "[char]176",
-                "prev": "[char]177",
-                "stop": "[char]178"
-            }
-            if action in key_map:
-                os.system(f"powershell -c $wsh=New-Object -ComObject WScript.Shell; $wsh.SendKeys({key_map[action]})")
+        """Queue a media key. Sent by flush_keys()."""
+        if IS_WINDOWS and action in self.MEDIA_KEYS:
+            self._pending_keys.append(self.MEDIA_KEYS[action])
+    
+    def flush_keys(self):
+        """Send all queued keys in one call to the shared PowerShell session."""
+        if not self._pending_keys:
+            return
+        sends = "; ".join(f"$wsh.SendKeys([char]{code})" for code in self._pending_keys)
+        self._pending_keys.clear()
+        self._powershell(f"if (-not $wsh) {{ $wsh=New-Object -ComObject WScript.Shell }}; {sends}")
     
     def take_screenshot(self, path: Optional[str] = None) -> str:
         """Take a screenshot."""
+        if not path:
+            path = os.path.join(_HOME, "Desktop", "tess_screenshot.png")
+        
         try:
-            from PIL import ImageGrab
-            screenshot = ImageGrab.grab()
-            
-            if not path:
-                path = os.path.join(os.path.expanduser("~"), "Desktop", "tess_screenshot.png")
-            
-            screenshot.save(path)
+            try:
+                with mss.mss() as sct:
+                    sct.shot(output=path)
+            except Exception:
+                # mss missing, or unable to capture here (Wayland, no DISPLAY)
+                ImageGrab.grab().save(path)
             return f"Screenshot saved to {path}"
         except ImportError:
             return "PIL not installed. Run: pip install pillow"
@@ -123,11 +519,9 @@ class SystemController:
     def list_processes(self, limit: int = 10) -> str:
         """List running processes."""
         try:
-            if platform.system() == "Windows":
-                result = subprocess.run(
-                    ["powershell", "-Command", f"Get-Process | Select-Object -First {limit} | Format-Table -AutoSize"],
-                    capture_output=True,
-                    text=True
+            if IS_WINDOWS:
+                return self._powershell(
+                    f"Get-Process | Select-Object -First {int(limit)} | Format-Table -AutoSize | Out-String -Width 200"
                 )
             else:
                 result = subprocess.run(
@@ -137,8 +531,6 @@ class SystemController:
                 )
                 lines = result.stdout.split('\n')[:limit+1]
                 return '\n'.join(lines)
-            
-            return result.stdout
         except Exception as e:
             return f"Failed to list processes: {e}"
 
@@ -149,22 +541,31 @@ class FileManager:
     def list_dir(self, path: str) -> str:
         """List directory contents."""
         try:
-            items = os.listdir(path)
-            result = []
-            for item in items[:50]:
-                full_path = os.path.join(path, item)
-                item_type = "📁" if os.path.isdir(full_path) else "📄"
-                result.append(f"{item_type} {item}")
-            return '\n'.join(result) if result else "Empty directory"
+            # scandir's is_dir() uses the directory entry's type, no stat per item
+            with os.scandir(path) as it:
+                listing = '\n'.join(
+                    f"{'📁' if entry.is_dir() else '📄'} {entry.name}"
+                    for entry in itertools.islice(it, 50)
+                )
+            return listing or "Empty directory"
         except Exception as e:
             return f"Error: {e}"
     
     def read_file(self, path: str, max_chars: int = 5000) -> str:
         """Read file contents."""
         try:
-            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read(max_chars)
-            return content
+            # One read of at most 4 bytes per char (UTF-8's maximum), then one
+            # decode, instead of going through the buffered text layer
+            fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                data = os.read(fd, max_chars * 4)
+            finally:
+                os.close(fd)
+            text = data.decode('utf-8', errors='ignore')
+            # Match text mode's universal newlines
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            return text[:max_chars]
         except Exception as e:
             return f"Error reading file: {e}"
     
@@ -180,6 +581,24 @@ class FileManager:
     def patch_file(self, path: str, search_text: str, replace_text: str) -> str:
         """Replace text in file."""
         try:
+            search = search_text.encode('utf-8')
+            replace = replace_text.encode('utf-8')
+            with open(path, 'r+b') as f:
+                if search and os.fstat(f.fileno()).st_size:
+                    with mmap.mmap(f.fileno(), 0) as mm:
+                        idx = mm.find(search)
+                        # Text mode reads CRLF as LF, so a multi-line search can
+                        # still match such a file below
+                        if idx < 0 and not (b"\n" in search and mm.find(b"\r\n") >= 0):
+                            return "Search text not found in file"
+                        if idx >= 0 and len(replace) == len(search):
+                            # Same length: patch every match in place, no rewrite
+                            while idx >= 0:
+                                mm[idx:idx + len(search)] = replace
+                                idx = mm.find(search, idx + len(search))
+                            mm.flush()
+                            return f"File patched: {path}"
+            
             with open(path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
@@ -200,42 +619,13 @@ class AppLauncher:
     """Launches applications."""
     
     def __init__(self):
-        self.app_map = self._build_app_map()
-    
-    def _build_app_map(self) -> Dict[str, str]:
-        """Build map of app names to commands."""
-        apps = {
-            "chrome": "chrome",
-            "firefox": "firefox",
-            "edge": "msedge",
-            "notepad": "notepad",
-            "calculator": "calc",
-            "explorer": "explorer",
-            "cmd": "cmd",
-            "powershell": "powershell",
-            "code": "code",
-            "spotify": "spotify",
-        }
-        
-        if platform.system() == "Darwin":
-            apps = {
-                "chrome": "open -a 'Google Chrome'",
-                "firefox": "open -a Firefox",
-                "safari": "open -a Safari",
-                "terminal": "open -a Terminal",
-            }
-        elif platform.system() == "Linux":
-            apps = {
-                "chrome": "google-chrome",
-                "firefox": "firefox",
-                "terminal": "gnome-terminal",
-            }
-        
-        return apps
+        self.app_map = _APP_MAP
     
     def get_launch_command(self, app_name: str) -> Optional[str]:
         """Get launch command for an app."""
-        app_name = app_name.lower().replace('.exe', '')
+        app_name = app_name.lower()
+        if app_name.endswith('.exe'):
+            app_name = app_name[:-4]
         return self.app_map.get(app_name)
     
     def launch(self, app_name: str) -> str:
@@ -245,10 +635,13 @@ class AppLauncher:
             return f"Unknown app: {app_name}"
         
         try:
-            if platform.system() == "Windows":
+            if IS_WINDOWS:
+                # The shell resolves .cmd/.bat launchers such as VS Code's
                 subprocess.Popen(cmd, shell=True)
             else:
-                subprocess.Popen(cmd, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                argv = _APP_ARGV.get(cmd) or shlex.split(cmd)
+                subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                 start_new_session=True)
             return f"Launched {app_name}"
         except Exception as e:
             return f"Failed to launch {app_name}: {e}"
@@ -282,68 +675,24 @@ class Orchestrator:
         Returns:
             Result string
         """
-        def output(text: str):
-            if output_callback:
-                output_callback(text)
-            else:
-                print(text)
+        # Nested calls (plan steps, skills) share the caller's buffer
+        if isinstance(output_callback, _BufferedOutput):
+            output = output_callback
+        else:
+            output = _BufferedOutput(output_callback)
         
         action_type = action.get("action", "error")
         
-        # Route to handler
-        handlers = {
-            # Core
-            "launch_app": self._handle_launch_app,
-            "execute_command": self._handle_execute_command,
-            "system_control": self._handle_system_control,
-            "file_op": self._handle_file_op,
-            "browser_control": self._handle_browser_control,
-            "web_search_op": self._handle_web_search,
-            "web_op": self._handle_web_op,
-            "reply_op": self._handle_reply,
-            "error": self._handle_error,
-            
-            # Communication
-            "whatsapp_op": self._handle_whatsapp,
-            "gmail_op": self._handle_gmail,
-            "calendar_op": self._handle_calendar,
-            
-            # Media
-            "youtube_op": self._handle_youtube,
-            
-            # AI & Planning
-            "planner_op": self._handle_planner,
-            "teach_skill": self._handle_teach_skill,
-            "run_skill": self._handle_run_skill,
-            "research_op": self._handle_research,
-            "trip_planner_op": self._handle_trip_planner,
-            "converter_op": self._handle_converter,
-            "code_op": self._handle_code,
-            "memory_op": self._handle_memory,
-            "organize_op": self._handle_organize,
-            "task_op": self._handle_task,
-            
-            # Document AI
-            "document_op": self._handle_document,
-            
-            # Workflows
-            "workflow_op": self._handle_workflow,
-            
-            # Notion
-            "notion_op": self._handle_notion,
-            
-            # Preferences
-            "preference_op": self._handle_preference,
-        }
-        
-        handler = handlers.get(action_type)
+        handler = self._HANDLERS.get(action_type)
         if handler:
             try:
-                return handler(action, output, brain)
+                return handler(self, action, output, brain)
             except Exception as e:
                 error_msg = f"Error in {action_type}: {str(e)}"
                 output(f"[ERROR] {error_msg}")
                 return error_msg
+            finally:
+                output.flush_now()
         else:
             return f"Unhandled action type: {action_type}"
     
@@ -352,25 +701,26 @@ class Orchestrator:
     def _handle_launch_app(self, action, output, brain):
         app_name = action.get("app_name", "")
         output(f"[TESS] Launching {app_name}...")
+        output.flush_now()
         result = self.apps.launch(app_name)
         output(f"[TESS] {result}")
         return result
     
     def _handle_execute_command(self, action, output, brain):
         command = action.get("command", "")
-        is_dangerous = action.get("is_dangerous", False)
+        pending = self._plan_command(command, action.get("is_dangerous", False))
         
         output(f"[TESS] Executing: {command}")
+        output.flush_now()
         
-        if is_dangerous or self._is_dangerous_command(command):
-            if self.config.security.level == "HIGH":
-                return "Command blocked by HIGH security level"
-            if self.config.security.confirm_dangerous:
-                confirm = input("⚠️  Dangerous command. Execute? [y/N]: ")
-                if confirm.lower() != 'y':
-                    return "Command cancelled"
+        if pending.blocked:
+            return "Command blocked by HIGH security level"
+        if pending.needs_confirm:
+            confirm = input("⚠️  Dangerous command. Execute? [y/N]: ")
+            if confirm.lower() != 'y':
+                return "Command cancelled"
         
-        result = self.executor.execute_command(command, confirm_dangerous=False)
+        result = _wait_result(self.executor.execute(pending))
         output(f"[OUTPUT]\n{result[:1000]}")
         return result
     
@@ -379,10 +729,12 @@ class Orchestrator:
         
         if "volume" in sub:
             self.system.set_volume(sub.replace("volume_", ""))
+            self.system.flush_keys()
             return f"Volume {sub}"
         elif "media" in sub or sub in ["play_pause", "play", "pause", "next", "prev"]:
             action_name = sub.replace("media_", "").replace("play_pause", "playpause")
             self.system.media_control(action_name)
+            self.system.flush_keys()
             return f"Media {action_name}"
         elif sub == "screenshot":
             result = self.system.take_screenshot()
@@ -396,7 +748,7 @@ class Orchestrator:
     
     def _handle_file_op(self, action, output, brain):
         sub = action.get("sub_action", "")
-        path = os.path.expanduser(action.get("path", ""))
+        path = _expand_home(action.get("path", ""))
         
         # Check if path exists
         if not os.path.exists(path):
@@ -418,18 +770,15 @@ class Orchestrator:
                 output(f"[CONTENT]\n{result[:1000]}...")
         elif sub == "analyze":
             # New: analyze files in directory or single file
+            doc_ai = self._document_ai(brain)
             if is_directory:
-                from .document_ai import DocumentAI
-                doc_ai = DocumentAI(brain)
                 results = doc_ai.batch_process(path)
                 output(f"[ANALYZED {len(results)} files in {path}]")
-                for name, content in list(results.items())[:5]:
+                for name, content in itertools.islice(results.items(), 5):
                     output(f"  {name}: {content[:100]}...")
                 result = f"Analyzed {len(results)} files"
             else:
                 # Single file analysis
-                from .document_ai import DocumentAI
-                doc_ai = DocumentAI(brain)
                 result = doc_ai.summarize_document(path)
                 output(f"[ANALYSIS]\n{result}")
         elif sub == "write":
@@ -470,11 +819,13 @@ class Orchestrator:
     def _handle_web_search(self, action, output, brain):
         query = action.get("query", "")
         output(f"[TESS] Searching: {query}")
+        output.flush_now()
         
         # Try Playwright WebSearch first (better results)
         try:
-            from .playwright_browser import WebSearchPlaywright
-            searcher = WebSearchPlaywright()
+            searcher = self.components.get("web_search")
+            if searcher is None:
+                searcher = self.components["web_search"] = playwright_browser.WebSearchPlaywright()
             result = searcher.search_sync(query)
             output(f"[RESULTS]\n{result[:800]}")
             return result
@@ -531,7 +882,7 @@ class Orchestrator:
         sub = action.get("sub_action", "")
         path = action.get("path", "")
         
-        doc_ai = _get_document_ai(brain)
+        doc_ai = self._document_ai(brain)
         
         if sub == "extract_text":
             ext = Path(path).suffix.lower()
@@ -568,7 +919,7 @@ class Orchestrator:
         sub = action.get("sub_action", "")
         
         if "workflow_engine" not in self.components:
-            self.components["workflow_engine"] = _get_workflow_engine(brain, self)
+            self.components["workflow_engine"] = workflow_engine.WorkflowEngine(brain, self)
         
         engine = self.components["workflow_engine"]
         
@@ -608,8 +959,7 @@ class Orchestrator:
         sub = action.get("sub_action", "")
         
         if "notion_client" not in self.components:
-            from .notion_client import NotionClient
-            self.components["notion_client"] = NotionClient()
+            self.components["notion_client"] = notion_client.NotionClient()
         
         client = self.components["notion_client"]
         
@@ -643,7 +993,7 @@ class Orchestrator:
         sub = action.get("sub_action", "")
         
         if "preference_memory" not in self.components:
-            self.components["preference_memory"] = _get_preference_memory()
+            self.components["preference_memory"] = preference_memory.PreferenceMemory("default")
         
         prefs = self.components["preference_memory"]
         
@@ -686,17 +1036,16 @@ class Orchestrator:
         if "whatsapp_client" not in self.components:
             # Try Playwright first (more reliable), fallback to Selenium
             try:
-                from .playwright_browser import WhatsAppPlaywright
-                self.components["whatsapp_client"] = WhatsAppPlaywright(brain)
+                self.components["whatsapp_client"] = playwright_browser.WhatsAppPlaywright(brain)
             except ImportError:
-                from .whatsapp_client import WhatsAppClient
-                self.components["whatsapp_client"] = WhatsAppClient(brain)
+                self.components["whatsapp_client"] = whatsapp_client.WhatsAppClient(brain)
         
         client = self.components["whatsapp_client"]
         
         if sub == "send":
             msg = action.get("message", "")
             output(f"[WHATSAPP] Sending to {contact}...")
+            output.flush_now()
             # Use sync wrapper for async method
             if hasattr(client, 'send_message_sync'):
                 result = client.send_message_sync(contact, msg)
@@ -706,9 +1055,8 @@ class Orchestrator:
             output(f"[TESS] {result}")
             return result
         elif sub == "monitor":
-            from .task_registry import TaskRegistry
             if "task_registry" not in self.components:
-                self.components["task_registry"] = TaskRegistry()
+                self.components["task_registry"] = task_registry.TaskRegistry()
             task_reg = self.components["task_registry"]
             task_id = task_reg.start_task(f"WA-{contact}", client.monitor_loop, (contact,))
             return f"Monitoring {contact} (Task: {task_id})"
@@ -724,8 +1072,7 @@ class Orchestrator:
         sub = action.get("sub_action", "")
         
         if "google_client" not in self.components:
-            from .google_client import GoogleClient
-            self.components["google_client"] = GoogleClient()
+            self.components["google_client"] = google_client.GoogleClient()
         
         client = self.components["google_client"]
         
@@ -751,8 +1098,7 @@ class Orchestrator:
         sub = action.get("sub_action", "")
         
         if "google_client" not in self.components:
-            from .google_client import GoogleClient
-            self.components["google_client"] = GoogleClient()
+            self.components["google_client"] = google_client.GoogleClient()
         
         client = self.components["google_client"]
         
@@ -782,17 +1128,16 @@ class Orchestrator:
         if "youtube_client" not in self.components:
             # Try Playwright first for better reliability
             try:
-                from .playwright_browser import PlaywrightBrowser
-                self.components["youtube_client"] = PlaywrightBrowser(headless=False)
+                self.components["youtube_client"] = playwright_browser.PlaywrightBrowser(headless=False)
             except ImportError:
-                from .youtube_client import YouTubeClient
-                self.components["youtube_client"] = YouTubeClient(headless=False)
+                self.components["youtube_client"] = youtube_client.YouTubeClient(headless=False)
         
         client = self.components["youtube_client"]
         
         if sub == "play":
             query = action.get("query", "")
             output(f"[YOUTUBE] Playing: {query}")
+            output.flush_now()
             result = client.play_video(query)
             output(f"[TESS] {result}")
             return result
@@ -807,16 +1152,17 @@ class Orchestrator:
         if not self.config.features.planner:
             return "Planner disabled in config"
         
-        from .planner import Planner
-        planner = Planner(brain)
+        task_planner = planner.Planner(brain)
         
         goal = action.get("goal", "")
         output(f"[PLANNER] Planning: {goal}")
+        output.flush_now()
         
-        plan = planner.create_plan(goal)
+        plan = task_planner.create_plan(goal)
         if plan:
             output(f"[PLAN] {len(plan)} steps")
-            planner.execute_plan(plan, self, output)
+            output.flush_now()
+            task_planner.execute_plan(plan, self, output)
             return f"Executed plan with {len(plan)} steps"
         return "Planning failed"
     
@@ -824,17 +1170,15 @@ class Orchestrator:
         if not self.config.features.skills:
             return "Skills disabled in config"
         
-        from .skill_manager import SkillManager
-        from .planner import Planner
-        
-        skill_mgr = SkillManager()
-        planner = Planner(brain)
+        skill_mgr = self._skill_manager()
+        task_planner = planner.Planner(brain)
         
         name = action.get("name", "")
         goal = action.get("goal", "")
         
         output(f"[SKILL] Learning '{name}'...")
-        plan = skill_mgr.learn_skill(name, goal, planner)
+        output.flush_now()
+        plan = skill_mgr.learn_skill(name, goal, task_planner)
         
         if plan:
             return f"Skill '{name}' learned with {len(plan)} steps"
@@ -844,29 +1188,26 @@ class Orchestrator:
         if not self.config.features.skills:
             return "Skills disabled in config"
         
-        from .skill_manager import SkillManager
-        
-        skill_mgr = SkillManager()
+        skill_mgr = self._skill_manager()
         name = action.get("name", "")
         
         output(f"[SKILL] Running '{name}'...")
+        output.flush_now()
         return skill_mgr.run_skill(name, self, output)
     
     def _handle_research(self, action, output, brain):
         if not self.config.features.research:
             return "Research disabled in config"
         
-        from ..skills.research import ResearchSkill
+        ResearchSkill = cached_import("..skills.research", "ResearchSkill")
         
         # Ensure web browser - use WebSearchPlaywright for search capability
         if "web_browser" not in self.components:
             try:
-                from .playwright_browser import WebSearchPlaywright
-                self.components["web_browser"] = WebSearchPlaywright()
+                self.components["web_browser"] = playwright_browser.WebSearchPlaywright()
             except ImportError:
                 # Fallback to Selenium
-                from .web_browser import WebBrowser
-                self.components["web_browser"] = WebBrowser()
+                self.components["web_browser"] = web_browser.WebBrowser()
         
         researcher = ResearchSkill(brain, self.components["web_browser"])
         
@@ -874,6 +1215,7 @@ class Orchestrator:
         depth = action.get("depth", 3)
         
         output(f"[RESEARCH] Researching: {topic}")
+        output.flush_now()
         result = researcher.run(topic, depth)
         output(f"[TESS] {result}")
         return result
@@ -882,11 +1224,10 @@ class Orchestrator:
         if not self.config.features.trip_planner:
             return "Trip planner disabled in config"
         
-        from ..skills.trip_planner import TripPlannerSkill
+        TripPlannerSkill = cached_import("..skills.trip_planner", "TripPlannerSkill")
         
         if "web_browser" not in self.components:
-            from .web_browser import WebBrowser
-            self.components["web_browser"] = WebBrowser()
+            self.components["web_browser"] = web_browser.WebBrowser()
         
         planner = TripPlannerSkill(brain, self.components["web_browser"])
         
@@ -904,9 +1245,10 @@ class Orchestrator:
         if not self.config.features.file_converter:
             return "File converter disabled in config"
         
-        from ..skills.converter import ConverterSkill
-        
-        converter = ConverterSkill()
+        converter = self.components.get("converter")
+        if converter is None:
+            ConverterSkill = cached_import("..skills.converter", "ConverterSkill")
+            converter = self.components["converter"] = ConverterSkill()
         
         # Handle source paths (could be string or list)
         source_paths = action.get("source_paths", [])
@@ -920,7 +1262,7 @@ class Orchestrator:
         # Expand user paths and clean quotes
         cleaned_paths = []
         for path in source_paths:
-            path = os.path.expanduser(path.strip('"\''))
+            path = _expand_home(path.strip('"\''))
             cleaned_paths.append(path)
         
         result = converter.run(
@@ -957,8 +1299,7 @@ class Orchestrator:
         
         sub = action.get("sub_action", "")
         
-        from .memory_engine import MemoryEngine
-        memory = MemoryEngine()
+        memory = _get_memory_engine()
         
         if sub == "memorize":
             content = action.get("content", "")
@@ -974,13 +1315,17 @@ class Orchestrator:
         if not self.config.features.organizer:
             return "Organizer disabled in config"
         
-        from .organizer import Organizer
-        
-        organizer = Organizer(brain)
+        organizer = self.components.get("organizer")
+        if organizer is None:
+            Organizer = cached_import(".organizer", "Organizer")
+            organizer = self.components["organizer"] = Organizer(brain)
+        else:
+            organizer.brain = brain
         path = action.get("path", "")
         criteria = action.get("criteria", "type")
         
         output(f"[ORGANIZER] Organizing {path} by {criteria}...")
+        output.flush_now()
         result = organizer.organize(path, criteria)
         output(f"[TESS] {result}")
         return result
@@ -989,10 +1334,8 @@ class Orchestrator:
         if not self.config.features.task_registry:
             return "Task registry disabled in config"
         
-        from .task_registry import TaskRegistry
-        
         if "task_registry" not in self.components:
-            self.components["task_registry"] = TaskRegistry()
+            self.components["task_registry"] = task_registry.TaskRegistry()
         
         registry = self.components["task_registry"]
         sub = action.get("sub_action", "")
@@ -1011,14 +1354,82 @@ class Orchestrator:
     
     # ===== Helper Methods =====
     
+    def _document_ai(self, brain):
+        """Shared DocumentAI component, kept pointed at the current brain."""
+        doc_ai = self.components.get("document_ai")
+        if doc_ai is None:
+            doc_ai = self.components["document_ai"] = document_ai.DocumentAI(brain)
+        elif brain is not None:
+            doc_ai.brain = brain
+        return doc_ai
+    
+    def _skill_manager(self):
+        """Shared SkillManager, so saved skills are read from disk only once."""
+        skill_mgr = self.components.get("skill_manager")
+        if skill_mgr is None:
+            SkillManager = cached_import(".skill_manager", "SkillManager")
+            skill_mgr = self.components["skill_manager"] = SkillManager()
+        return skill_mgr
+    
+    def _plan_command(self, command: str, is_dangerous: bool = False) -> PendingCommand:
+        """Apply the security policy to a command before anything runs."""
+        security = self.config.security
+        dangerous = is_dangerous or self._is_dangerous_command(command)
+        return PendingCommand(
+            command,
+            needs_confirm=dangerous and security.confirm_dangerous,
+            blocked=dangerous and security.level == "HIGH"
+        )
+    
     def _is_dangerous_command(self, command: str) -> bool:
         """Check if command is potentially dangerous."""
-        patterns = [
-            "rm -rf", "del /s", "format", "rd /s", "rmdir /s",
-            "shutdown", "taskkill", "reg delete"
-        ]
-        cmd_lower = command.lower()
-        return any(p in cmd_lower for p in patterns)
+        return _DANGEROUS_RE.search(command) is not None
+
+    # action type -> handler, built once with the class
+    _HANDLERS = {
+        # Core
+        "launch_app": _handle_launch_app,
+        "execute_command": _handle_execute_command,
+        "system_control": _handle_system_control,
+        "file_op": _handle_file_op,
+        "browser_control": _handle_browser_control,
+        "web_search_op": _handle_web_search,
+        "web_op": _handle_web_op,
+        "reply_op": _handle_reply,
+        "error": _handle_error,
+        
+        # Communication
+        "whatsapp_op": _handle_whatsapp,
+        "gmail_op": _handle_gmail,
+        "calendar_op": _handle_calendar,
+        
+        # Media
+        "youtube_op": _handle_youtube,
+        
+        # AI & Planning
+        "planner_op": _handle_planner,
+        "teach_skill": _handle_teach_skill,
+        "run_skill": _handle_run_skill,
+        "research_op": _handle_research,
+        "trip_planner_op": _handle_trip_planner,
+        "converter_op": _handle_converter,
+        "code_op": _handle_code,
+        "memory_op": _handle_memory,
+        "organize_op": _handle_organize,
+        "task_op": _handle_task,
+        
+        # Document AI
+        "document_op": _handle_document,
+        
+        # Workflows
+        "workflow_op": _handle_workflow,
+        
+        # Notion
+        "notion_op": _handle_notion,
+        
+        # Preferences
+        "preference_op": _handle_preference,
+    }
 
 
 def process_action(action, config, output_callback=None, brain=None, components=None) -> str:
@@ -2,18 +2,38 @@
 Organizer - File organization automation.
 """
 
+import bisect
+import errno
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from datetime import datetime
 
+# Upper bound on threads used to move files in parallel
+_MAX_MOVE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def _move(src: str, dst: str):
+    """Rename src to dst, copying only when they are on different filesystems."""
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
 
 class Organizer:
     """
     Organizes files based on criteria.
     """
     
+    # Size buckets: < 1MB small, 1MB - 100MB medium, >= 100MB large
+    _SIZE_THRESHOLDS = (1024 * 1024, 100 * 1024 * 1024)
+    _SIZE_NAMES = ('small', 'medium', 'large')
+    
     def __init__(self, brain=None):
         self.brain = brain
         
@@ -29,6 +49,8 @@ class Organizer:
             'code': ['.py', '.js', '.html', '.css', '.java', '.cpp', '.c', '.h'],
             'executables': ['.exe', '.msi', '.dmg', '.pkg', '.deb']
         }
+        # Extension -> category, for one lookup per file
+        self._ext_to_cat = {ext: cat for cat, exts in self.type_map.items() for ext in exts}
     
     def organize(self, path: str, criteria: str = "type") -> str:
         """
@@ -54,97 +76,84 @@ class Organizer:
         else:
             return f"Unknown criteria: {criteria}"
     
+    @staticmethod
+    def _files(source: Path) -> List[os.DirEntry]:
+        """
+        Files directly inside source. Listed up front so moves don't disturb
+        the scan; DirEntry caches the type and stat results.
+        """
+        with os.scandir(source) as it:
+            return [entry for entry in it if entry.is_file()]
+    
     def _organize_by_type(self, source: Path) -> str:
         """Organize files by type."""
-        moved = 0
-        
-        for file in source.iterdir():
-            if file.is_file():
-                ext = file.suffix.lower()
-                
-                # Find category
-                category = 'others'
-                for cat, exts in self.type_map.items():
-                    if ext in exts:
-                        category = cat
-                        break
-                
-                # Create folder and move
-                target_dir = source / category
-                target_dir.mkdir(exist_ok=True)
-                
-                try:
-                    shutil.move(str(file), str(target_dir / file.name))
-                    moved += 1
-                except Exception as e:
-                    print(f"Error moving {file}: {e}")
+        placements = []
+        for entry in self._files(source):
+            ext = os.path.splitext(entry.name)[1].lower()
+            placements.append((entry, self._ext_to_cat.get(ext, 'others')))
         
+        moved = self._relocate(source, placements)
         return f"Organized {moved} files by type"
     
     def _organize_by_date(self, source: Path) -> str:
         """Organize files by modification date."""
-        moved = 0
-        
-        for file in source.iterdir():
-            if file.is_file():
-                # Get modification time
-                mtime = datetime.fromtimestamp(file.stat().st_mtime)
-                folder_name = mtime.strftime("%Y-%m")
-                
-                target_dir = source / folder_name
-                target_dir.mkdir(exist_ok=True)
-                
-                try:
-                    shutil.move(str(file), str(target_dir / file.name))
-                    moved += 1
-                except Exception as e:
-                    print(f"Error moving {file}: {e}")
+        placements = []
+        for entry in self._files(source):
+            # Get modification time
+            mtime = datetime.fromtimestamp(entry.stat().st_mtime)
+            placements.append((entry, mtime.strftime("%Y-%m")))
         
+        moved = self._relocate(source, placements)
         return f"Organized {moved} files by date"
     
     def _organize_by_size(self, source: Path) -> str:
         """Organize files by size."""
-        moved = 0
+        placements = []
+        for entry in self._files(source):
+            size = entry.stat().st_size
+            category = self._SIZE_NAMES[bisect.bisect_right(self._SIZE_THRESHOLDS, size)]
+            placements.append((entry, category))
         
-        size_categories = {
-            'small': (0, 1024 * 1024),      # < 1MB
-            'medium': (1024 * 1024, 100 * 1024 * 1024),  # 1MB - 100MB
-            'large': (100 * 1024 * 1024, float('inf'))   # > 100MB
-        }
+        moved = self._relocate(source, placements)
+        return f"Organized {moved} files by size"
+    
+    @staticmethod
+    def _relocate(source: Path, placements: List[Tuple[os.DirEntry, str]]) -> int:
+        """
+        Move each (entry, folder) pair into source/folder and return how many
+        moved. Folders are created first; the moves run on a thread pool so
+        slow (e.g. network) filesystems overlap their round trips.
+        """
+        for folder in {folder for _, folder in placements}:
+            (source / folder).mkdir(exist_ok=True)
         
-        for file in source.iterdir():
-            if file.is_file():
-                size = file.stat().st_size
-                
-                # Find category
-                category = 'others'
-                for cat, (min_size, max_size) in size_categories.items():
-                    if min_size <= size < max_size:
-                        category = cat
-                        break
-                
-                target_dir = source / category
-                target_dir.mkdir(exist_ok=True)
-                
-                try:
-                    shutil.move(str(file), str(target_dir / file.name))
-                    moved += 1
-                except Exception as e:
-                    print(f"Error moving {file}: {e}")
+        def move(placement) -> bool:
+            entry, folder = placement
+            try:
+                _move(entry.path, os.path.join(source, folder, entry.name))
+                return True
+            except Exception as e:
+                print(f"Error moving {entry.path}: {e}")
+                return False
         
-        return f"Organized {moved} files by size"
+        if len(placements) < 2:
+            return sum(map(move, placements))
+        with ThreadPoolExecutor(max_workers=min(_MAX_MOVE_WORKERS, len(placements))) as pool:
+            return sum(pool.map(move, placements))
     
     def clean_empty_folders(self, path: str) -> str:
         """Remove empty folders."""
-        source = Path(path)
         removed = 0
         
-        for folder in source.rglob('*'):
-            if folder.is_dir() and not any(folder.iterdir()):
-                try:
-                    folder.rmdir()
-                    removed += 1
-                except:
-                    pass
+        # Bottom-up, so a folder emptied by removing its children goes in the
+        # same pass. rmdir fails on anything still holding entries.
+        for dirpath, dirnames, filenames in os.walk(path, topdown=False):
+            if filenames or dirpath == path:
+                continue
+            try:
+                os.rmdir(dirpath)
+                removed += 1
+            except OSError:
+                pass
         
         return f"Removed {removed} empty folders"
@@ -4,11 +4,22 @@ Replaces Selenium with Playwright for better reliability.
 """
 
 import asyncio
+import atexit
 import os
 import time
 from typing import Optional, Dict, Any
 from pathlib import Path
 
+_CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled',
+    '--no-first-run',
+    '--start-maximized'
+]
+_VIEWPORT = {'width': 1280, 'height': 800}
+
 
 class PlaywrightBrowser:
     """
@@ -16,16 +27,21 @@ class PlaywrightBrowser:
     More reliable than Selenium for web apps like WhatsApp Web.
     """
     
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, persistent: bool = True):
         self.headless = headless
+        # persistent=False launches a plain browser with no saved profile,
+        # which can hand out throwaway contexts via new_context()
+        self.persistent = persistent
         self.browser = None
         self.context = None
         self.page = None
         self.playwright = None
+        # Event loop for the sync wrappers; Playwright objects are bound to it
+        self._loop = None
     
     async def _init(self):
         """Initialize Playwright."""
-        if self.context:  # FIX: Check context, not browser
+        if self.context or self.browser:  # either handle means _init already ran
             return
         
         try:
@@ -33,6 +49,12 @@ class PlaywrightBrowser:
             
             self.playwright = await async_playwright().start()
             
+            if not self.persistent:
+                self.browser = await self.playwright.chromium.launch(
+                    headless=self.headless, args=_CHROMIUM_ARGS
+                )
+                return
+            
             # Create context with persistent storage for WhatsApp login
             from ..config_manager import get_config_manager
             config = get_config_manager()
@@ -43,16 +65,9 @@ class PlaywrightBrowser:
             self.context = await self.playwright.chromium.launch_persistent_context(
                 str(user_data),
                 headless=self.headless,
-                viewport={'width': 1280, 'height': 800},
+                viewport=_VIEWPORT,
                 permissions=['notifications'],
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-blink-features=AutomationControlled',
-                    '--no-first-run',
-                    '--start-maximized'
-                ]
+                args=_CHROMIUM_ARGS
             )
             
             # FIX: Persistent context returns context directly, get page from it
@@ -63,12 +78,25 @@ class PlaywrightBrowser:
             
         except ImportError:
             raise ImportError("Playwright not installed. Run: pip install playwright && playwright install chromium")
+        except Exception:
+            # Don't leave the driver running after a failed launch
+            await self.close()
+            raise
     
     async def goto(self, url: str, wait_until: str = "networkidle"):
         """Navigate to URL."""
         await self._init()
+        if self.page is None:
+            # persistent=False starts without a page; open one on first use
+            self.context = await self.browser.new_context(viewport=_VIEWPORT)
+            self.page = await self.context.new_page()
         await self.page.goto(url, wait_until=wait_until)
     
+    async def new_context(self):
+        """Open a fresh context on the running browser (persistent=False only)."""
+        await self._init()
+        return await self.browser.new_context(viewport=_VIEWPORT)
+    
     async def click(self, selector: str, timeout: int = 5000):
         """Click element with auto-wait."""
         await self.page.click(selector, timeout=timeout)
@@ -112,36 +140,57 @@ class PlaywrightBrowser:
     
     async def close(self):
         """Close browser."""
+        # Clear each handle even if closing it fails, so _init can start over
         try:
             if self.context:
                 await self.context.close()
-                self.context = None
         except Exception:
             pass
+        self.context = None
+        try:
+            if self.browser:
+                await self.browser.close()
+        except Exception:
+            pass
+        self.browser = None
         try:
             if self.playwright:
                 await self.playwright.stop()
-                self.playwright = None
         except Exception:
             pass
+        self.playwright = None
         self.page = None
     
     # ===== Sync wrappers for easier use =====
     
+    def _run(self, coro):
+        """Run coro on this browser's own loop, kept open between calls."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+    
     def goto_sync(self, url: str, wait_until: str = "networkidle"):
-        return asyncio.run(self.goto(url, wait_until))
+        return self._run(self.goto(url, wait_until))
     
     def click_sync(self, selector: str, timeout: int = 5000):
-        return asyncio.run(self.click(selector, timeout))
+        return self._run(self.click(selector, timeout))
     
     def fill_sync(self, selector: str, text: str, timeout: int = 5000):
-        return asyncio.run(self.fill(selector, text, timeout))
+        return self._run(self.fill(selector, text, timeout))
     
     def get_text_sync(self, selector: str, timeout: int = 5000) -> str:
-        return asyncio.run(self.get_text(selector, timeout))
+        return self._run(self.get_text(selector, timeout))
     
     def screenshot_sync(self, path: str):
-        return asyncio.run(self.screenshot(path))
+        return self._run(self.screenshot(path))
+    
+    def close_sync(self):
+        """Close the browser and its event loop."""
+        if self._loop is None:
+            return
+        self._loop.run_until_complete(self.close())
+        self._loop.close()
+        self._loop = None
 
 
 class WhatsAppPlaywright:
@@ -276,20 +325,26 @@ class WebSearchPlaywright:
     """
     
     def __init__(self):
-        self.browser = PlaywrightBrowser(headless=True)
+        # Kept running between searches; each query gets its own context
+        self.browser = PlaywrightBrowser(headless=True, persistent=False)
+        atexit.register(self.close)
     
     async def search(self, query: str) -> str:
         """Search Google and return results."""
+        context = None
         try:
             from urllib.parse import quote_plus
             encoded_query = quote_plus(query)
-            await self.browser.goto(f"https://www.google.com/search?q={encoded_query}")
+            browser = self.browser.browser
+            if browser is not None and not browser.is_connected():
+                # Crashed or disconnected; reset so new_context relaunches
+                await self.browser.close()
+            context = await self.browser.new_context()
+            page = await context.new_page()
+            await page.goto(f"https://www.google.com/search?q={encoded_query}", wait_until="networkidle")
             
             # Wait for results
-            await self.browser.wait_for_selector("#search", timeout=10000)
-            
-            # Extract results
-            page = self.browser.page
+            await page.wait_for_selector("#search", timeout=10000)
             
             # Get search results
             results = await page.query_selector_all("div.g")
@@ -312,10 +367,18 @@ class WebSearchPlaywright:
         except Exception as e:
             return f"Search error: {e}"
         finally:
-            await self.browser.close()
+            if context:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
     
     def search_sync(self, query: str) -> str:
-        return asyncio.run(self.search(query))
+        return self.browser._run(self.search(query))
+    
+    def close(self):
+        """Shut down the browser."""
+        self.browser.close_sync()
 
 
 # Factory function to migrate gradually
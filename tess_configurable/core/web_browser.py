@@ -6,7 +6,6 @@ Uses Selenium for browser automation.
 import time
 import urllib.parse
 from typing import Optional
-from pathlib import Path
 
 
 class WebBrowser:
@@ -148,7 +147,7 @@ class WebBrowser:
             if output_path is None:
                 from ..config_manager import get_config_manager
                 config = get_config_manager()
-                output_path = str(Path(config.config.paths.temp_dir) / f"screenshot_{int(time.time())}.png")
+                output_path = str(config.ensure_path("temp_dir") / f"screenshot_{int(time.time())}.png")
             
             self.driver.get(url)
             time.sleep(2)
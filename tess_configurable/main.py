@@ -237,7 +237,7 @@ class TessTerminal:
             return
         
         console.print("\n[bold]Conversation History[/bold]\n")
-        for msg in self.brain.history[-10:]:  # Last 10
+        for msg in list(self.brain.history)[-10:]:  # Last 10
             role = msg.get("role", "unknown")
             content = msg.get("content", "")
             
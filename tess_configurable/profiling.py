@@ -0,0 +1,92 @@
+"""
+Opt-in profiling for TESS Configurable Edition.
+
+Set TESS_PROFILE=1 to record call counts and wall time for the functions
+decorated with @measure and to profile the whole session. A report is
+printed to stderr on exit. The session profiler is pyinstrument when
+installed, otherwise cProfile. Set TESS_PROFILE_OUT=<file> to also save
+the profile (pyinstrument HTML or cProfile stats, e.g. for snakeviz).
+
+When TESS_PROFILE is unset, @measure returns the function unchanged, so
+there is no overhead.
+"""
+
+import atexit
+import functools
+import os
+import sys
+import time
+from typing import Dict, List
+
+ENABLED = bool(os.environ.get("TESS_PROFILE"))
+
+# qualified function name -> [calls, total seconds]
+_stats: Dict[str, List[float]] = {}
+_profiler = None
+
+
+def measure(func):
+    """Count calls and accumulate wall time for func when profiling is on."""
+    if not ENABLED:
+        return func
+
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            entry = _stats.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += time.perf_counter() - start
+
+    return wrapper
+
+
+def _start():
+    """Start the session profiler."""
+    global _profiler
+    try:
+        import pyinstrument
+        _profiler = pyinstrument.Profiler()
+        _profiler.start()
+    except ImportError:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    atexit.register(_report)
+
+
+def _report():
+    """Print collected timings and the session profile."""
+    out = sys.stderr
+
+    if _stats:
+        print("\n[TESS_PROFILE] calls    total ms     avg ms  function", file=out)
+        for name, (calls, total) in sorted(_stats.items(), key=lambda kv: -kv[1][1]):
+            print(f"[TESS_PROFILE] {calls:5d} {total * 1000:11.1f} {total * 1000 / calls:10.2f}  {name}", file=out)
+
+    if _profiler is None:
+        return
+
+    path = os.environ.get("TESS_PROFILE_OUT")
+    if hasattr(_profiler, "output_text"):
+        # pyinstrument
+        _profiler.stop()
+        print(_profiler.output_text(unicode=True), file=out)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(_profiler.output_html())
+    else:
+        import pstats
+        _profiler.disable()
+        stats = pstats.Stats(_profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(30)
+        if path:
+            stats.dump_stats(path)
+
+
+if ENABLED:
+    _start()